@@ -0,0 +1,201 @@
+from __future__ import annotations
+import functools
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .jsonio import read_json, write_json
+from .logging import debug
+
+# Keyword ranking shared by `query --hybrid` and the `dump` fallback. bm25s scores with a
+# sparse matrix and is much faster on large corpora; rank_bm25 is the baseline dependency.
+
+
+@functools.lru_cache(maxsize=1)
+def _backends() -> Tuple[Any, Any]:
+    """(bm25s module, rank_bm25.BM25Okapi), each None if not installed; imported on first use."""
+    try:
+        import bm25s
+    except Exception:
+        bm25s = None  # optional dependency
+    try:
+        from rank_bm25 import BM25Okapi
+    except Exception:
+        BM25Okapi = None  # optional dependency
+    return bm25s, BM25Okapi
+
+
+@functools.lru_cache(maxsize=1)
+def _stemmer() -> Any:
+    """PyStemmer's English stemmer for bm25s (C implementation), or None if not installed."""
+    try:
+        import Stemmer
+    except Exception:
+        return None  # optional dependency
+    return Stemmer.Stemmer("english")
+
+
+# Identifier-shaped tokens, so punctuation doesn't stick to words ("foo(bar)," -> foo, bar)
+_TOK = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOK.findall(text.lower())
+
+
+def _bm25s_tokenize(bm25s: Any, texts: List[str]) -> Any:
+    return bm25s.tokenize(texts, stopwords="en", stemmer=_stemmer(), show_progress=False)
+
+
+def available() -> bool:
+    return any(b is not None for b in _backends())
+
+
+def backend_name() -> str:
+    """Identifies backend + tokenization, for validating persisted models."""
+    if _backends()[0] is not None:
+        return "bm25s-en-stem" if _stemmer() is not None else "bm25s-en"
+    return "rank_bm25-re"
+
+
+def _backend_version() -> str:
+    """Installed library version, so an upgrade never reads state written by another release."""
+    from importlib.metadata import version
+
+    dist = "bm25s" if _backends()[0] is not None else "rank-bm25"
+    try:
+        return f"{dist}=={version(dist)}"
+    except Exception:
+        return dist
+
+
+def fit(texts: Sequence[str]) -> Any:
+    bm25s, BM25Okapi = _backends()
+    if bm25s is not None:
+        model = bm25s.BM25()
+        model.index(_bm25s_tokenize(bm25s, list(texts)), show_progress=False)
+        return model
+    if BM25Okapi is None:
+        raise RuntimeError("No BM25 backend installed (pip install rank-bm25, or bm25s)")
+    return BM25Okapi([_tokenize(t) for t in texts])
+
+
+# Persisted state lives in persist_dir/bm25/: bm25s' own save() layout (npy arrays +
+# JSON vocab/params) or, for rank_bm25, its term statistics as JSON. Nothing there is
+# executable, since persist_dir can be named by API callers. key.json is written last.
+STATE_DIR = "bm25"
+KEY_FILE = "key.json"
+OKAPI_FILE = "okapi.json"
+
+
+def _save(state_dir: Path, key: List[Any], model: Any) -> None:
+    shutil.rmtree(state_dir, ignore_errors=True)
+    state_dir.mkdir(parents=True)
+    bm25s, _ = _backends()
+    if bm25s is not None and isinstance(model, bm25s.BM25):
+        model.save(str(state_dir), allow_pickle=False)
+    else:
+        write_json(state_dir / OKAPI_FILE, {k: v for k, v in vars(model).items() if k != "tokenizer"})
+    write_json(state_dir / KEY_FILE, key)
+
+
+def _n_docs(model: Any) -> int:
+    scores = getattr(model, "scores", None)
+    return scores["num_docs"] if isinstance(scores, dict) else model.corpus_size
+
+
+def _load(state_dir: Path, key: List[Any]) -> Any:
+    """The persisted model if its key matches, else None."""
+    try:
+        if read_json(state_dir / KEY_FILE) != key:
+            return None
+        bm25s, BM25Okapi = _backends()
+        if bm25s is not None:
+            return bm25s.BM25.load(str(state_dir), allow_pickle=False)
+        model = BM25Okapi.__new__(BM25Okapi)
+        model.__dict__.update(read_json(state_dir / OKAPI_FILE), tokenizer=None)
+        return model
+    except Exception:
+        return None
+
+
+# persist_dir -> (key, rows, model). Rows are cached with the model so a warm query only
+# checks the manifest (docstore_version) and never re-reads docstore.json. The lock also
+# keeps concurrent server requests from loading or fitting twice.
+_CORPORA: Dict[str, Tuple[List[Any], List[Dict[str, Any]], Any]] = {}
+_LOCK = threading.RLock()
+
+
+def load_corpus(persist_dir: Path) -> Tuple[List[Dict[str, Any]], Any]:
+    """
+    (rows, model): the docstore's node texts (docstore.load_node_texts) and BM25 over them,
+    memoized in-process and saved under persist_dir/bm25/. Keyed on the docstore version,
+    the backend and its library version, so a re-index, backend switch or upgrade refits
+    once. The model is None for an empty corpus (neither backend can fit one).
+    """
+    from .docstore import docstore_version, load_node_texts
+
+    version = docstore_version(persist_dir)
+    key = [version, backend_name(), _backend_version()]
+    state_dir = persist_dir / STATE_DIR
+    with _LOCK:
+        hit = _CORPORA.get(str(persist_dir))
+        if hit is not None and hit[0] == key:
+            return hit[1], hit[2]
+        rows = load_node_texts(persist_dir)
+        model = None
+        if rows:
+            model = _load(state_dir, key) if version else None
+            if model is not None and _n_docs(model) != len(rows):
+                model = None
+            if model is None:
+                model = fit([r["text"] for r in rows])
+                if version:
+                    try:
+                        _save(state_dir, key, model)
+                    except Exception:
+                        pass  # disk cache is best-effort
+                # Superseded pickle format (never loaded)
+                (persist_dir / "bm25.pkl").unlink(missing_ok=True)
+        _CORPORA[str(persist_dir)] = (key, rows, model)
+        return rows, model
+
+
+def search(persist_dir: Path, query: str, k: int) -> List[Dict[str, Any]]:
+    """Top-k docstore rows ({"text", "file_path", "ref_id"}) for `query`, best first."""
+    rows, model = load_corpus(persist_dir)
+    return [rows[i] for i in top_k(model, query, k, len(rows))]
+
+
+def prebuild(persist_dir: Path) -> bool:
+    """Fit and persist the model for a freshly written docstore, so queries start warm."""
+    if not available():
+        return False
+    _, model = load_corpus(persist_dir)
+    if model is None:
+        debug(f"BM25 prebuild: no node texts in {persist_dir}")
+        return False
+    return True
+
+
+def top_k(model: Any, query: str, k: int, n_docs: int) -> List[int]:
+    """Indices of the k best-scoring documents (out of n_docs), best first."""
+    k = min(k, n_docs)
+    if k <= 0 or model is None:
+        return []
+    bm25s, _ = _backends()
+    if bm25s is not None and isinstance(model, bm25s.BM25):
+        query_tokens = _bm25s_tokenize(bm25s, [query])
+        docs, _ = model.retrieve(query_tokens, k=k, show_progress=False)
+        return [int(i) for i in docs[0]]
+
+    import numpy as np
+
+    scores = np.asarray(model.get_scores(_tokenize(query)))
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable").tolist()
+    # O(N) partition, then sort only the k survivors
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")].tolist()
@@ -1,17 +1,11 @@
 from __future__ import annotations
+import os
 import sys
 from pathlib import Path
 import typer
 from rich import print as rprint
-from .config import load_profile, ensure_dir, Profile
+from .config import load_profile, load_env_once, ensure_dir, Profile
 from .logging import info, warn, err
-from .indexer import build_index
-from .query import query_index
-from .explain_where import explain_symbol, where_symbol
-from .inspect_dump import inspect_index, dump_snippets_md, dump_snippets_jsonl
-from .server import app as fastapi_app
-import uvicorn
-import time
 
 app = typer.Typer(add_completion=False, help="Repo-aware RAG CLI for LLM-assisted coding.")
 
@@ -23,6 +17,7 @@ def inspect(
     profile: str = typer.Option(None, help="Profile name (e.g., pint)"),
     local_config: str = typer.Option(None, help="Project-local .ragcode.toml"),
 ):
+    from .inspect_dump import inspect_index
     p = _profile(profile, local_config)
     persist = Path(p.persist).expanduser()
     rprint(inspect_index(persist))
@@ -36,13 +31,16 @@ def index(
     ref: str = typer.Option(None, help="Git ref/branch/tag (overrides profile.ref)"),
     persist: str = typer.Option(None, help="Persist dir (overrides profile.persist)"),
     incremental: bool = typer.Option(True, "--incremental/--no-incremental", help="Incremental update instead of full rebuild"),
+    strict_manifest: bool = typer.Option(False, "--strict-manifest", help="Serialize the profile snapshot via pydantic model_dump"),
 ):
+    from .indexer import build_index
+    load_env_once()
     p = _profile(profile, local_config)
     if path: p.path = path
     if repo: p.repo = repo
     if ref: p.ref = ref
     if persist: p.persist = persist
-    manifest = build_index(p, incremental=incremental)
+    manifest = build_index(p, incremental=incremental, strict_manifest=strict_manifest)
     rprint(manifest)
 
 @app.command()
@@ -56,6 +54,8 @@ def query(
     persist: str = typer.Option(None, help="Persist dir override"),
     local_config: str = typer.Option(None, help="Project-local .ragcode.toml"),
 ):
+    from .query import query_index
+    load_env_once()
     p = _profile(profile, local_config)
     persist_dir = Path(persist or p.persist).expanduser()
     res = query_index(persist_dir, query_str, k, citations, hybrid, format)
@@ -71,6 +71,7 @@ def explain(
     persist: str = typer.Option(None),
     local_config: str = typer.Option(None),
 ):
+    from .explain_where import explain_symbol
     p = _profile(profile, local_config)
     persist_dir = Path(persist or p.persist).expanduser()
     rprint(explain_symbol(persist_dir, symbol))
@@ -82,6 +83,7 @@ def where(
     persist: str = typer.Option(None),
     local_config: str = typer.Option(None),
 ):
+    from .explain_where import where_symbol
     p = _profile(profile, local_config)
     persist_dir = Path(persist or p.persist).expanduser()
     rprint(where_symbol(persist_dir, symbol))
@@ -96,6 +98,8 @@ def dump(
     persist: str = typer.Option(None),
     local_config: str = typer.Option(None),
 ):
+    from .inspect_dump import dump_snippets_md, dump_snippets_jsonl
+    load_env_once()
     p = _profile(profile, local_config)
     persist_dir = Path(persist or p.persist).expanduser()
     out_path = Path(out)
@@ -113,8 +117,14 @@ def watch(
     debounce: float = typer.Option(2.0, help="Seconds to debounce rebuilds"),
 ):
     """
-    Watch a local path and re-index on file changes (incremental in future; full rebuild now).
+    Watch a local path and re-index changed files once edits settle for `debounce` seconds.
+    Only the touched files are re-split/re-embedded; a change to the local config file
+    (--local-config, default ./.ragcode.toml) reloads the profile and runs a full build.
     """
+    import time
+    import threading
+    from .indexer import build_index, update_files
+    load_env_once()
     try:
         from watchdog.observers import Observer
         from watchdog.events import FileSystemEventHandler
@@ -124,18 +134,39 @@ def watch(
 
     p = _profile(profile, local_config)
     p.path = path
+    config_path = Path(local_config or ".ragcode.toml").resolve()
+
+    lock = threading.Lock()
+    pending: set[str] = set()
+    last_event = 0.0
+    # Opened/closed events include our own re-reads, which would re-trigger forever
+    content_events = {"created", "modified", "deleted", "moved"}
+
+    def _persist_dir() -> Path:
+        return Path(os.path.expanduser(p.persist)).resolve()
+
+    persist_dir = _persist_dir()
 
     class Handler(FileSystemEventHandler):
-        def __init__(self):
-            self._last = 0.0
         def on_any_event(self, event):
-            nonlocal p
-            now = time.time()
-            if now - self._last < debounce:  # debounce
+            nonlocal last_event
+            if event.event_type not in content_events:
+                return
+            # Directory deletes/moves/creates stand for every file under them (update_files
+            # expands them); directory "modified" just means its listing changed
+            if event.is_directory and event.event_type == "modified":
+                return
+            paths = [event.src_path]
+            dest = getattr(event, "dest_path", "")
+            if dest:
+                paths.append(dest)
+            # Index writes land here when the persist dir sits inside the watched tree
+            paths = [c for c in paths if not Path(c).resolve().is_relative_to(persist_dir)]
+            if not paths:
                 return
-            self._last = now
-            info("Change detected. Re-indexing...")
-            build_index(p)
+            with lock:
+                pending.update(paths)
+                last_event = time.time()
 
     obs = Observer()
     obs.schedule(Handler(), path, recursive=True)
@@ -144,6 +175,21 @@ def watch(
     try:
         while True:
             time.sleep(1)
+            with lock:
+                if not pending or time.time() - last_event < debounce:  # debounce
+                    continue
+                changed = set(pending)
+                pending.clear()
+            # Only the config actually loaded; .ragcode.toml files elsewhere (vendored trees) are inert
+            if any(Path(c).resolve() == config_path for c in changed):
+                info("Config changed. Reloading profile and rebuilding...")
+                p = _profile(profile, local_config)
+                p.path = path
+                persist_dir = _persist_dir()
+                build_index(p)
+            else:
+                info(f"Change detected in {len(changed)} path(s). Re-indexing...")
+                update_files(p, changed)
     except KeyboardInterrupt:
         obs.stop()
     obs.join()
@@ -154,6 +200,8 @@ def serve(
     port: int = typer.Option(8008),
     reload: bool = typer.Option(False),
 ):
+    import uvicorn
+    load_env_once()
     uvicorn.run("ragcode.server:app", host=host, port=port, reload=reload)
 
 if __name__ == "__main__":
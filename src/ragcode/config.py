@@ -1,10 +1,13 @@
 from __future__ import annotations
 import os
+import functools
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, FrozenSet, Tuple
 from pydantic import BaseModel, Field
-import tomlkit
-from dotenv import load_dotenv
+try:
+    import tomllib  # Python >= 3.11
+except ImportError:  # pragma: no cover
+    import tomli as tomllib  # type: ignore
 
 DEFAULT_PERSIST = Path.home() / ".ragcode" / "indexes"
 
@@ -26,34 +29,81 @@ class Profile(BaseModel):
     parallel: int = 8
     max_file_size_kb: int = 1024
 
+    # Set views for membership tests in file-walking loops. Computed on access (not
+    # cached) so they stay correct after CLI overrides and model_construct.
+    @property
+    def ext_set(self) -> FrozenSet[str]:
+        return frozenset(self.ext)
+
+    @property
+    def include_set(self) -> FrozenSet[str]:
+        return frozenset(self.include)
+
 class Settings(BaseModel):
     profile: Profile
     env: Dict[str, Any] = Field(default_factory=dict)
 
 def _read_toml(path: Path) -> Dict[str, Any]:
-    data = tomlkit.parse(path.read_text(encoding="utf-8"))
-    return dict(data)
+    with path.open("rb") as f:
+        return tomllib.load(f)
 
-def load_profile(profile_name: Optional[str], local_config: Optional[Path]) -> Profile:
-    # Load .env early
-    load_dotenv(dotenv_path=Path(".env"), override=False)
+@functools.lru_cache(maxsize=32)
+def _read_toml_cached(path_str: str, mtime_ns: int) -> Dict[str, Any]:
+    # mtime_ns is part of the key so an edited profile is re-read automatically
+    return _read_toml(Path(path_str))
 
-    # 1) start with packaged default if profile_name matches a bundled file
-    pkg_profile_path = Path(__file__).with_name("profiles") / f"{profile_name or 'default'}.toml"
-    base: Dict[str, Any] = _read_toml(pkg_profile_path) if pkg_profile_path.exists() else {}
+def _profile_sources(profile_name: Optional[str], local_config: Optional[Path]) -> Tuple[Tuple[str, int], ...]:
+    """(path, mtime_ns) for each existing profile file, in merge order (later wins)."""
+    name = profile_name or "default"
+    candidates = [
+        # 1) packaged default if profile_name matches a bundled file
+        Path(__file__).with_name("profiles") / f"{name}.toml",
+        # 2) user profile from ~/.ragcode/profiles/{name}.toml
+        Path.home() / ".ragcode" / "profiles" / f"{name}.toml",
+    ]
+    # 3) project-local .ragcode.toml
+    if local_config:
+        candidates.append(local_config)
+    out = []
+    for p in candidates:
+        try:
+            out.append((str(p), p.stat().st_mtime_ns))
+        except OSError:
+            continue
+    return tuple(out)
 
-    # 2) merge user profile from ~/.ragcode/profiles/{name}.toml
-    user_profile_dir = Path.home() / ".ragcode" / "profiles"
-    user_profile_path = user_profile_dir / f"{profile_name or 'default'}.toml"
-    if user_profile_path.exists():
-        base.update(_read_toml(user_profile_path))
+@functools.lru_cache(maxsize=16)
+def _load_profile_cached(
+    profile_name: Optional[str], sources: Tuple[Tuple[str, int], ...], strict: bool
+) -> Profile:
+    base: Dict[str, Any] = {}
+    for path_str, mtime_ns in sources:
+        base.update(_read_toml_cached(path_str, mtime_ns))
+    if not base:
+        base = {"name": profile_name or "default"}
+    if strict:
+        return Profile(**base)
+    # Profile files are trusted input: fill defaults and skip validation
+    merged: Dict[str, Any] = {}
+    for field_name, field in Profile.model_fields.items():
+        if field_name in base:
+            merged[field_name] = base[field_name]
+        else:
+            merged[field_name] = field.get_default(call_default_factory=True)
+    return Profile.model_construct(**merged)
 
-    # 3) merge project-local .ragcode.toml
-    if local_config and local_config.exists():
-        base.update(_read_toml(local_config))
+@functools.lru_cache(maxsize=1)
+def load_env_once() -> None:
+    """Load ./.env (without overriding the environment) once per process."""
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=Path(".env"), override=False)
 
-    # Fill defaults via pydantic
-    return Profile(**base) if base else Profile(name=profile_name or "default")
+def load_profile(profile_name: Optional[str], local_config: Optional[Path]) -> Profile:
+    sources = _profile_sources(profile_name, local_config)
+    # RAGCODE_STRICT=1 runs full pydantic validation (e.g. once in CI); part of the cache key
+    strict = os.environ.get("RAGCODE_STRICT", "").strip() not in {"", "0"}
+    # Callers override fields (path, persist, ...) on the result; hand out a copy
+    return _load_profile_cached(profile_name, sources, strict).model_copy(deep=True)
 
 def ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
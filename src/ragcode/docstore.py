@@ -0,0 +1,169 @@
+from __future__ import annotations
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .jsonio import read_json_cached
+
+# Optional: incremental parser so large docstores are never fully materialized
+try:
+    import ijson
+except Exception:
+    ijson = None  # optional dependency
+
+# LlamaIndex simple_kvstore docstore shapes (0.13.x):
+#   {"docstore_data": { id: { "id_":..., "text":..., "metadata": {...} } }}
+#   {"data": { id: { "id_":..., "text":..., "metadata": {...} } }}
+CONTAINER_KEYS = ("docstore_data", "data")
+
+# Above this size, stream entries instead of parsing the whole file at once
+STREAM_THRESHOLD_BYTES = 10 * 1024 * 1024
+
+
+def docstore_digest(persist_dir: Path) -> Optional[str]:
+    """blake2b of docstore.json, read a block at a time; recorded in the manifest at index time."""
+    h = hashlib.blake2b(digest_size=16)
+    try:
+        with (persist_dir / "docstore.json").open("rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def docstore_version(persist_dir: Path) -> str:
+    """
+    Cache key for everything derived from the docstore (loaded index, engines, BM25).
+    Uses the manifest's docstore_blake2, so a warm check only stats the small manifest
+    (after `watch` updates it is chained from the previous digest and the delta instead);
+    indexes written before it was recorded fall back to docstore.json's (mtime_ns, size).
+    """
+    try:
+        digest = read_json_cached(persist_dir / "manifest.json").get("docstore_blake2")
+    except Exception:
+        digest = None
+    if digest:
+        return f"blake2:{digest}"
+    try:
+        st = (persist_dir / "docstore.json").stat()
+    except OSError:
+        return ""
+    return f"stat:{st.st_mtime_ns}:{st.st_size}"
+
+
+def iter_docstore(persist_dir: Path) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (node_id, entry) pairs from persist_dir/docstore.json.
+    Yields nothing if the file is missing, unreadable, or has an unknown shape.
+    """
+    ds = persist_dir / "docstore.json"
+    try:
+        size = ds.stat().st_size
+    except OSError:
+        return
+    if ijson is not None and size > STREAM_THRESHOLD_BYTES:
+        for key in CONTAINER_KEYS:
+            found = False
+            try:
+                with ds.open("rb") as f:
+                    for nid, entry in ijson.kvitems(f, key, use_float=True):
+                        found = True
+                        yield nid, entry
+            except Exception:
+                return
+            if found:
+                return
+        return
+    try:
+        raw = read_json_cached(ds)
+    except Exception:
+        return
+    for key in CONTAINER_KEYS:
+        container = raw.get(key)
+        if isinstance(container, dict):
+            yield from container.items()
+            return
+
+
+def _entry_path(node: Any) -> Tuple[str, Any]:
+    meta = node.get("metadata") or (node.get("node") or {}).get("metadata") or {}
+    cpath = meta.get("canonical_path") or meta.get("file_path") or ""
+    return cpath.replace("\\", "/"), node.get("id_")
+
+
+# Fields needed for (canonical_path, id), relative to one docstore entry
+_PATH_FIELDS = (
+    "metadata.canonical_path",
+    "metadata.file_path",
+    "node.metadata.canonical_path",
+    "node.metadata.file_path",
+)
+
+
+def iter_docstore_paths(persist_dir: Path) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (canonical_path, node_id) per docstore entry. Large docstores are walked as a
+    raw ijson event stream, so node text is never built into Python strings.
+    """
+    ds = persist_dir / "docstore.json"
+    try:
+        size = ds.stat().st_size
+    except OSError:
+        return
+    if ijson is None or size <= STREAM_THRESHOLD_BYTES:
+        for _, node in iter_docstore(persist_dir):
+            if isinstance(node, dict):
+                yield _entry_path(node)
+        return
+    for key in CONTAINER_KEYS:
+        found = False
+        fields: Dict[str, str] = {}
+        entry = None
+        try:
+            with ds.open("rb") as f:
+                for prefix, event, value in ijson.parse(f):
+                    if prefix == key and event in ("map_key", "end_map"):
+                        if entry is not None:
+                            found = True
+                            cpath = next((fields[k] for k in _PATH_FIELDS if fields.get(k)), "")
+                            yield cpath.replace("\\", "/"), fields.get("id_")
+                        entry = value if event == "map_key" else None
+                        fields = {}
+                    elif entry is not None and event == "string":
+                        # prefix is "<key>.<entry id>.<field path>"
+                        field = prefix[len(key) + len(entry) + 2:]
+                        if field == "id_" or field in _PATH_FIELDS:
+                            fields[field] = value
+        except Exception:
+            return
+        if found:
+            return
+
+
+def _node_text_meta(node: Any) -> Tuple[str, Dict[str, Any]]:
+    """(text, metadata) of one entry: top-level (TextNode), or nested under "node" or "data"."""
+    if not isinstance(node, dict):
+        return "", {}
+    for obj in (node, node.get("node"), node.get("data")):
+        if isinstance(obj, dict):
+            text = obj.get("text")
+            if isinstance(text, str) and text:
+                meta = obj.get("metadata")
+                return text, meta if isinstance(meta, dict) else {}
+    return "", {}
+
+
+def load_node_texts(persist_dir: Path) -> List[Dict[str, Any]]:
+    """
+    {"text", "file_path", "ref_id"} per docstore node with text: the BM25 corpus, in docstore
+    order, for both `query --hybrid` and the `dump` fallback (they share one fitted model).
+    Entries are streamed (see iter_docstore) and only these fields are kept.
+    """
+    result = []
+    for _, node in iter_docstore(persist_dir):
+        text, meta = _node_text_meta(node)
+        if not text:
+            continue  # nothing to rank or show
+        result.append({"text": text, "file_path": meta.get("file_path", "?"), "ref_id": node.get("id_", "")})
+    return result
@@ -0,0 +1,95 @@
+from __future__ import annotations
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+from llama_index.core import Settings
+from llama_index.core.schema import MetadataMode
+
+from .logging import info
+
+# SQLite's default limit on host parameters is 999
+_SELECT_CHUNK = 500
+
+# Incremental builds never delete rows, so keep the file bounded: past this many rows the
+# oldest inserts are dropped (at worst those chunks are embedded again). Full rebuilds
+# prune everything the new index doesn't reference.
+MAX_CACHE_ROWS = 100_000
+
+
+def _content_key(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _connect(persist_dir: Path) -> sqlite3.Connection:
+    con = sqlite3.connect(str(persist_dir / "embed_cache.sqlite"))
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS embeddings ("
+        "hash TEXT NOT NULL, model TEXT NOT NULL, vec BLOB NOT NULL, PRIMARY KEY (hash, model))"
+    )
+    return con
+
+
+def _prune(con: sqlite3.Connection, model: str, live: List[str]) -> None:
+    con.execute("CREATE TEMP TABLE live (hash TEXT PRIMARY KEY)")
+    con.executemany("INSERT OR IGNORE INTO live (hash) VALUES (?)", ((h,) for h in live))
+    con.execute("DELETE FROM embeddings WHERE model != ? OR hash NOT IN (SELECT hash FROM live)", (model,))
+    con.execute("DROP TABLE live")
+
+
+def _cap(con: sqlite3.Connection) -> None:
+    over = con.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - MAX_CACHE_ROWS
+    if over > 0:
+        con.execute("DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY rowid LIMIT ?)", (over,))
+
+
+def apply_embedding_cache(nodes: List[Any], persist_dir: Path, model: str, prune: bool = False) -> None:
+    """
+    Set `node.embedding` on every node, embedding only content not seen before.
+    The cache is keyed by (blake2b of the text the embed model sees, model spec);
+    vectors are stored as float16. LlamaIndex skips nodes whose embedding is already set.
+    With prune=True (`nodes` is the whole index), rows for any other content are deleted.
+    """
+    keyed = [(n, n.get_content(metadata_mode=MetadataMode.EMBED)) for n in nodes if hasattr(n, "get_content")]
+    if not keyed:
+        return
+    hashes = [_content_key(text) for _, text in keyed]
+
+    con = _connect(persist_dir)
+    try:
+        vecs: Dict[str, List[float]] = {}
+        uniq = list(set(hashes))
+        for i in range(0, len(uniq), _SELECT_CHUNK):
+            chunk = uniq[i:i + _SELECT_CHUNK]
+            rows = con.execute(
+                f"SELECT hash, vec FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(chunk))})",
+                [model, *chunk],
+            )
+            for h, blob in rows:
+                vecs[h] = np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist()
+        hits = len(vecs)
+
+        missing: Dict[str, str] = {}
+        for h, (_, text) in zip(hashes, keyed):
+            if h not in vecs:
+                missing.setdefault(h, text)
+        if missing:
+            new = Settings.embed_model.get_text_embedding_batch(list(missing.values()), show_progress=True)
+            con.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, model, vec) VALUES (?, ?, ?)",
+                [(h, model, np.asarray(v, dtype=np.float16).tobytes()) for h, v in zip(missing, new)],
+            )
+            vecs.update(zip(missing, new))
+        if prune:
+            _prune(con, model, uniq)
+        elif missing:
+            _cap(con)
+        con.commit()
+    finally:
+        con.close()
+
+    for h, (n, _) in zip(hashes, keyed):
+        n.embedding = vecs[h]
+    info(f"Embeddings: {hits} cached, {len(missing)} new")
@@ -1,8 +1,12 @@
 from __future__ import annotations
-from typing import Optional
-import requests
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import httpx
 
 from llama_index.core import Settings
+from llama_index.core.bridge.pydantic import PrivateAttr
 from llama_index.core.embeddings import BaseEmbedding
 
 # OpenAI embeddings (hosted)
@@ -14,57 +18,139 @@ except Exception:  # pragma: no cover
 
 # --- Ollama adapter -----------------------------------------------------------
 
+OLLAMA_BATCH_SIZE = 64
+_OLLAMA_LIMITS = httpx.Limits(max_connections=16, max_keepalive_connections=16)
+
+
 class OllamaEmbedding(BaseEmbedding):
     """
-    Minimal embedding adapter for Ollama's /api/embeddings.
+    Minimal embedding adapter for Ollama.
+    Uses the batched /api/embed endpoint over a pooled httpx client; falls back to
+    per-text /api/embeddings on older servers. Call close() to release the pool.
     """
 
-    def __init__(self, model: str = "nomic-embed-text", host: str = "http://localhost:11434"):
-        self.model = model
-        self.host = host.rstrip("/")
+    model: str = "nomic-embed-text"
+    host: str = "http://localhost:11434"
+    parallel: int = 1
+
+    _client: httpx.Client = PrivateAttr()
+    _batch_api: bool = PrivateAttr(default=True)
+
+    def __init__(self, model: str = "nomic-embed-text", host: str = "http://localhost:11434", parallel: int = 1):
+        super().__init__(
+            model_name=model,
+            model=model,
+            host=host.rstrip("/"),
+            parallel=max(1, parallel),
+            # LlamaIndex hands _get_text_embeddings at most this many texts per call; make
+            # that enough for `parallel` concurrent /api/embed requests of OLLAMA_BATCH_SIZE
+            embed_batch_size=OLLAMA_BATCH_SIZE * max(1, parallel),
+        )
+        self._client = httpx.Client(base_url=self.host, timeout=120, limits=_OLLAMA_LIMITS)
+
+    def close(self) -> None:
+        self._client.close()
+
+    def __del__(self):
+        try:
+            self._client.close()
+        except Exception:
+            pass
+
+    def _chunks(self, texts) -> List[List[str]]:
+        texts = list(texts)
+        return [texts[i:i + OLLAMA_BATCH_SIZE] for i in range(0, len(texts), OLLAMA_BATCH_SIZE)]
+
+    # sync
+
+    def _embed_one(self, text: str) -> List[float]:
+        r = self._client.post("/api/embeddings", json={"model": self.model, "prompt": text})
+        r.raise_for_status()
+        return r.json()["embedding"]
+
+    def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        if self._batch_api:
+            r = self._client.post("/api/embed", json={"model": self.model, "input": texts})
+            if r.status_code != 404:
+                r.raise_for_status()
+                return r.json()["embeddings"]
+            # Older Ollama without /api/embed
+            self._batch_api = False
+        return [self._embed_one(t) for t in texts]
+
+    def _embed_batch(self, texts) -> List[List[float]]:
+        chunks = self._chunks(texts)
+        if len(chunks) <= 1 or self.parallel <= 1:
+            out: List[List[float]] = []
+            for c in chunks:
+                out.extend(self._embed_chunk(c))
+            return out
+        out = []
+        with ThreadPoolExecutor(max_workers=min(self.parallel, len(chunks))) as ex:
+            for vecs in ex.map(self._embed_chunk, chunks):
+                out.extend(vecs)
+        return out
+
+    # async (used by LlamaIndex's a* embedding APIs)
 
-    def _embed_batch(self, texts):
+    async def _aembed_chunk(self, client: httpx.AsyncClient, texts: List[str]) -> List[List[float]]:
+        if self._batch_api:
+            r = await client.post("/api/embed", json={"model": self.model, "input": texts})
+            if r.status_code != 404:
+                r.raise_for_status()
+                return r.json()["embeddings"]
+            self._batch_api = False
         out = []
         for t in texts:
-            r = requests.post(
-                f"{self.host}/api/embeddings",
-                json={"model": self.model, "prompt": t},
-                timeout=120,
-            )
+            r = await client.post("/api/embeddings", json={"model": self.model, "prompt": t})
             r.raise_for_status()
             out.append(r.json()["embedding"])
         return out
 
-    def get_query_embedding(self, query: str):
+    async def _aembed_batch(self, texts) -> List[List[float]]:
+        sem = asyncio.Semaphore(self.parallel)
+        # A client per call: AsyncClient is bound to the event loop it was used on
+        async with httpx.AsyncClient(base_url=self.host, timeout=120, limits=_OLLAMA_LIMITS) as client:
+            async def run(chunk: List[str]) -> List[List[float]]:
+                async with sem:
+                    return await self._aembed_chunk(client, chunk)
+
+            results = await asyncio.gather(*(run(c) for c in self._chunks(texts)))
+        return [v for vecs in results for v in vecs]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
         return self._embed_batch([query])[0]
 
-    def get_text_embedding(self, text: str):
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return (await self._aembed_batch([query]))[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
         return self._embed_batch([text])[0]
 
-    def get_text_embeddings(self, texts):
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._aembed_batch([text]))[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
         return self._embed_batch(texts)
 
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await self._aembed_batch(texts)
+
 
 # --- Setup helpers ------------------------------------------------------------
 
-def setup_embeddings_from_string(embed_spec: Optional[str]) -> None:
+@functools.lru_cache(maxsize=4)
+def _make_embed_model(embed_spec: str, parallel: int = 1) -> Optional[BaseEmbedding]:
     """
-    Configure LlamaIndex Settings.embed_model from a spec string:
-      - "openai:text-embedding-3-large"
-      - "local:bge-base-en-v1.5"
-      - "ollama:nomic-embed-text"
-    If None/empty or unknown, leave as-is (LlamaIndex default).
+    Build (once per spec) the embedding model for a spec string; None if unknown/unavailable.
+    Cached because constructors set up HTTP clients or, for HuggingFace, load model weights.
     """
-    if not embed_spec:
-        return
-
     if embed_spec.startswith("openai:"):
         model = embed_spec.split("openai:", 1)[1] or "text-embedding-3-large"
         if OpenAIEmbedding is None:
             # If the package isn't installed, we simply leave Settings.embed_model unset.
-            return
-        Settings.embed_model = OpenAIEmbedding(model=model)
-        return
+            return None
+        return OpenAIEmbedding(model=model)
 
     if embed_spec.startswith("local:"):
         model = embed_spec.split("local:", 1)[1]
@@ -72,14 +158,28 @@ def setup_embeddings_from_string(embed_spec: Optional[str]) -> None:
         try:
             from llama_index.embeddings.huggingface import HuggingFaceEmbedding  # type: ignore
         except Exception:
-            return
-        Settings.embed_model = HuggingFaceEmbedding(model_name=model)
-        return
+            return None
+        return HuggingFaceEmbedding(model_name=model)
 
     if embed_spec.startswith("ollama:"):
         model = embed_spec.split("ollama:", 1)[1] or "nomic-embed-text"
-        Settings.embed_model = OllamaEmbedding(model=model)
-        return
+        return OllamaEmbedding(model=model, parallel=parallel)
 
     # Unknown spec: do nothing (fallback to default)
-    return
+    return None
+
+
+def setup_embeddings_from_string(embed_spec: Optional[str], parallel: int = 1) -> None:
+    """
+    Configure LlamaIndex Settings.embed_model from a spec string:
+      - "openai:text-embedding-3-large"
+      - "local:bge-base-en-v1.5"
+      - "ollama:nomic-embed-text"
+    `parallel` bounds concurrent requests for backends that support it (Ollama).
+    If None/empty or unknown, leave as-is (LlamaIndex default).
+    """
+    if not embed_spec:
+        return
+    embed_model = _make_embed_model(embed_spec, parallel)
+    if embed_model is not None:
+        Settings.embed_model = embed_model
@@ -1,19 +1,38 @@
 from __future__ import annotations
-import json
+import functools
 from pathlib import Path
 from typing import Dict, Any, List
+from .jsonio import read_json
 from .logging import info, warn
+from .symbol_sidecar import iter_symbol_rows
 
-def _load_symbols(persist_dir: Path) -> List[Dict[str, Any]]:
-    p = persist_dir / "symbols.jsonl"
-    if not p.exists():
-        return []
-    return [json.loads(line) for line in p.read_text(encoding="utf-8").splitlines() if line.strip()]
+SymbolIndex = Dict[str, List[Dict[str, Any]]]
+
+@functools.lru_cache(maxsize=4)
+def _load_symbols_cached(path_str: str, mtime_ns: int) -> SymbolIndex:
+    p = Path(path_str)
+    if p.name == "symbols_by_name.json":
+        return read_json(p)
+    # Older indexes only have symbols.jsonl: build the name index once
+    index: SymbolIndex = {}
+    for row in iter_symbol_rows(p):
+        index.setdefault(row["symbol"], []).append(row)
+    return index
+
+def _load_symbols(persist_dir: Path) -> SymbolIndex:
+    """Symbol name -> definition rows, memoized on the sidecar's mtime."""
+    for name in ("symbols_by_name.json", "symbols.jsonl"):
+        p = persist_dir / name
+        try:
+            mtime_ns = p.stat().st_mtime_ns
+        except OSError:
+            continue
+        return _load_symbols_cached(str(p), mtime_ns)
+    return {}
 
 def explain_symbol(persist_dir: Path, symbol: str) -> str:
     """Best-effort: show where it's defined and provide context lines from the chunk store."""
-    symbols = _load_symbols(persist_dir)
-    hits = [s for s in symbols if s["symbol"] == symbol]
+    hits = _load_symbols(persist_dir).get(symbol, [])
     if not hits:
         return f"No symbol named '{symbol}' in symbols index."
     # Render simple report
@@ -24,8 +43,7 @@ def explain_symbol(persist_dir: Path, symbol: str) -> str:
     return "\n".join(out)
 
 def where_symbol(persist_dir: Path, symbol: str) -> str:
-    symbols = _load_symbols(persist_dir)
-    hits = [s for s in symbols if s["symbol"] == symbol]
+    hits = _load_symbols(persist_dir).get(symbol, [])
     if not hits:
         return f"No symbol named '{symbol}'."
     out = [f"# Locations for `{symbol}`"]
@@ -0,0 +1,101 @@
+from __future__ import annotations
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from .logging import warn
+
+GITHUB_API = "https://api.github.com"
+# Parallel blob downloads; well inside GitHub's secondary rate limits
+BLOB_CONCURRENCY = 10
+
+
+def _blob_path(cache_dir: Path, sha: str) -> Path:
+    return cache_dir / sha[:2] / sha
+
+
+def _fetch_blob(client: httpx.Client, owner: str, repo: str, sha: str, cache_dir: Path) -> bytes:
+    # Blob SHAs are content-addressed, so a cached body never goes stale
+    fp = _blob_path(cache_dir, sha)
+    try:
+        return fp.read_bytes()
+    except OSError:
+        pass
+    r = client.get(f"/repos/{owner}/{repo}/git/blobs/{sha}", headers={"Accept": "application/vnd.github.raw"})
+    r.raise_for_status()
+    fp.parent.mkdir(parents=True, exist_ok=True)
+    # Unique temp name per writer; a concurrent writer of the same SHA wrote the same bytes
+    with tempfile.NamedTemporaryFile(dir=fp.parent, prefix=f".{sha}.", delete=False) as tmp:
+        tmp.write(r.content)
+    try:
+        os.replace(tmp.name, fp)
+    except OSError:
+        os.unlink(tmp.name)
+        if not fp.exists():
+            raise
+    return r.content
+
+
+def _prune_cache(cache_dir: Path, live: Set[str]) -> None:
+    """Drop cached blobs (and stray temp files) that the current tree no longer references."""
+    try:
+        shards = list(os.scandir(cache_dir))
+    except OSError:
+        return
+    for shard in shards:
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if entry.name not in live:
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+        try:
+            os.rmdir(shard.path)  # only succeeds once the shard is empty
+        except OSError:
+            pass
+
+
+def fetch_repo_files(
+    owner: str,
+    repo: str,
+    ref: str,
+    token: Optional[str],
+    keep: Callable[[str, int], bool],
+    cache_dir: Path,
+) -> Optional[List[Tuple[str, bytes]]]:
+    """
+    (path, raw bytes) for every blob in `ref` for which keep(path, size) holds.
+    One recursive tree request, then only blobs missing from `cache_dir` are downloaded;
+    afterwards, cached blobs not in this tree are deleted.
+    Returns None if GitHub truncated the tree (very large repos).
+    """
+    headers = {"Accept": "application/vnd.github+json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    with httpx.Client(base_url=GITHUB_API, headers=headers, timeout=60) as client:
+        r = client.get(f"/repos/{owner}/{repo}/git/trees/{ref}", params={"recursive": "1"})
+        r.raise_for_status()
+        tree = r.json()
+        if tree.get("truncated"):
+            return None
+        wanted: Dict[str, str] = {
+            e["path"]: e["sha"]
+            for e in tree.get("tree", [])
+            if e.get("type") == "blob" and keep(e["path"], e.get("size", 0))
+        }
+        misses = sum(1 for sha in set(wanted.values()) if not _blob_path(cache_dir, sha).exists())
+        remaining = r.headers.get("x-ratelimit-remaining")
+        if remaining is not None and int(remaining) < misses:
+            warn(f"GitHub rate limit: {remaining} requests left for {misses} uncached blobs.")
+        # Identical files share a SHA: fetch each blob once
+        shas = sorted(set(wanted.values()))
+        with ThreadPoolExecutor(max_workers=BLOB_CONCURRENCY) as ex:
+            bodies = dict(zip(shas, ex.map(lambda sha: _fetch_blob(client, owner, repo, sha, cache_dir), shas)))
+    _prune_cache(cache_dir, set(shas))
+    return [(path, bodies[sha]) for path, sha in wanted.items()]
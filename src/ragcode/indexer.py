@@ -1,29 +1,53 @@
 from __future__ import annotations
 import os
-import json
+import functools
 import hashlib
+import multiprocessing
+import threading
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple, Set, DefaultDict
+from typing import TYPE_CHECKING, Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple, Set, DefaultDict
 from collections import defaultdict
-from datetime import datetime
-from dotenv import load_dotenv
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+from datetime import datetime, timezone
 from llama_index.core import VectorStoreIndex, Document, StorageContext, Settings, load_index_from_storage
 from llama_index.core.node_parser import SentenceSplitter, CodeSplitter
-from llama_index.readers.github import GithubRepositoryReader, GithubClient
-from llama_index.llms.openai import OpenAI
+from llama_index.core.schema import NodeRelationship, TextNode
+from . import bm25 as bm25_rank
 from .config import Profile, ensure_dir
+from .docstore import docstore_digest, docstore_version, iter_docstore_paths
+from .jsonio import cache_clear as json_cache_clear, read_json, read_json_cached, write_json
+from .symbol_sidecar import symbols_count as symbols_count_on_disk, update_symbols, write_symbols
 from .logging import info, warn
 from .symbols import extract_python_symbols
 from .embeddings import setup_embeddings_from_string
+from .embed_cache import apply_embedding_cache
+from .github_tree import fetch_repo_files
+
+try:
+    import blake3
+except Exception:
+    blake3 = None  # optional dependency
+
+if TYPE_CHECKING:
+    from llama_index.llms.openai import OpenAI
 
 # ---------- helpers ----------
 
-def _setup_llm():
-    Settings.llm = OpenAI(model="gpt-4o-mini")
+@functools.lru_cache(maxsize=4)
+def _openai_llm(model: str) -> OpenAI:
+    from llama_index.llms.openai import OpenAI  # local import: only needed once an LLM is set up
+
+    return OpenAI(model=model)
+
+def setup_llm(model: str = "gpt-4o-mini") -> None:
+    # Reuse one client per model; constructing OpenAI sets up HTTP clients each time
+    Settings.llm = _openai_llm(model)
 
 def _setup_embeddings(profile: Profile):
-    setup_embeddings_from_string(profile.embed)
+    setup_embeddings_from_string(profile.embed, parallel=profile.parallel)
 
+@functools.lru_cache(maxsize=1)
 def _tree_sitter_ok() -> bool:
     try:
         from tree_sitter_language_pack import get_parser  # noqa: F401
@@ -32,90 +56,270 @@ def _tree_sitter_ok() -> bool:
     except Exception:
         return False
 
-def _make_splitters(profile: Profile) -> Tuple[SentenceSplitter, Optional[CodeSplitter], bool]:
-    sent = SentenceSplitter(chunk_size=512, chunk_overlap=50)
-    code = None
-    use_code = False
-    if _tree_sitter_ok():
-        code = CodeSplitter(
+@functools.lru_cache(maxsize=1)
+def _sentence_splitter() -> SentenceSplitter:
+    return SentenceSplitter(chunk_size=512, chunk_overlap=50)
+
+# CodeSplitter wraps a tree-sitter Parser, which is not thread-safe: keep one per thread
+_splitter_local = threading.local()
+
+def _code_splitter(chunk_lines: int, overlap: int) -> CodeSplitter:
+    cache: Optional[Dict[Tuple[int, int], CodeSplitter]] = getattr(_splitter_local, "code", None)
+    if cache is None:
+        cache = _splitter_local.code = {}
+    key = (chunk_lines, overlap)
+    splitter = cache.get(key)
+    if splitter is None:
+        splitter = cache[key] = CodeSplitter(
             language="python",
-            chunk_lines=profile.chunk_lines,
-            chunk_lines_overlap=profile.chunk_overlap,
+            chunk_lines=chunk_lines,
+            chunk_lines_overlap=overlap,
         )
-        use_code = True
-    else:
-        warn("Tree-sitter not available; falling back to sentence splitting for code.")
-    return sent, code, use_code
+    return splitter
+
+def _make_splitters(profile: Profile) -> Tuple[SentenceSplitter, Optional[CodeSplitter], bool]:
+    sent = _sentence_splitter()
+    if _tree_sitter_ok():
+        return sent, _code_splitter(profile.chunk_lines, profile.chunk_overlap), True
+    warn("Tree-sitter not available; falling back to sentence splitting for code.")
+    return sent, None, False
+
+def _suffix(path: str) -> str:
+    """Path(path).suffix for a '/'-separated path, without building a Path."""
+    stem, dot, ext = path.rpartition("/")[2].rpartition(".")
+    return dot + ext if stem and ext else ""
 
 def _canon_for_local(base: Path, p: Path) -> str:
+    # `base` is resolved once by the caller, not per file
     try:
-        rel = p.resolve().relative_to(base.resolve())
+        rel = p.resolve().relative_to(base)
     except Exception:
         rel = p.name
     return str(rel).replace("\\", "/")
 
-def _load_from_github(profile: Profile) -> List[Document]:
-    token = os.environ.get("GITHUB_TOKEN")
+def _github_keep(profile: Profile) -> Callable[[str, int], bool]:
+    """
+    File filter for GitHub sources, shared by both loaders: under one of profile.include
+    (a directory prefix, matched on whole path components; top-level files are not
+    included, as with the repository reader's INCLUDE filter), with an indexed extension
+    and within max_file_size_kb.
+    """
+    prefixes = tuple(d.strip("/") + "/" for d in profile.include if d.strip("/"))
+    ext_set = profile.ext_set
+    max_size = profile.max_file_size_kb * 1024
+
+    def keep(path: str, size: int) -> bool:
+        return path.startswith(prefixes) and os.path.splitext(path)[1] in ext_set and size <= max_size
+
+    return keep
+
+def _github_reader_docs(profile: Profile, owner: str, repo: str, token: Optional[str]) -> List[Tuple[Document, str]]:
+    # local import: the reader package is only needed for this fallback
+    from llama_index.readers.github import GithubRepositoryReader, GithubClient
+
     client = GithubClient(github_token=token, verbose=True)
     reader = GithubRepositoryReader(
         client,
-        owner=profile.repo.split("/")[0],
-        repo=profile.repo.split("/")[1],
+        owner=owner,
+        repo=repo,
         use_parser=False,
         verbose=True,
-        concurrent_requests=2,
+        concurrent_requests=max(1, profile.parallel),
         filter_directories=(profile.include, GithubRepositoryReader.FilterType.INCLUDE),
         filter_file_extensions=(profile.ext, GithubRepositoryReader.FilterType.INCLUDE),
     )
-    docs = reader.load_data(branch=profile.ref)
-    for d in docs:
-        fp = d.id_
-        d.metadata.setdefault("file_path", fp)
-        d.metadata["canonical_path"] = str(fp).replace("\\", "/")
-        d.metadata["file_ext"] = Path(fp).suffix
+    # The reader's INCLUDE filter is a raw string prefix ("src" also admits "src_old/");
+    # re-apply the shared rule so both loaders index the same files
+    keep = _github_keep(profile)
+    out: List[Tuple[Document, str]] = []
+    for d in reader.load_data(branch=profile.ref):
+        path = str(d.metadata.get("file_path") or "").replace("\\", "/").lstrip("/")
+        data = d.text.encode("utf-8", errors="ignore")
+        if keep(path, len(data)):
+            out.append((d, _content_hash(data)))
+    return out
+
+def _github_tree_docs(
+    profile: Profile, owner: str, repo: str, token: Optional[str], persist_dir: Path
+) -> Optional[List[Tuple[Document, str]]]:
+    files = fetch_repo_files(owner, repo, profile.ref, token, _github_keep(profile), persist_dir / "_blob_cache")
+    if files is None:
+        return None
+    out: List[Tuple[Document, str]] = []
+    for path, raw in files:
+        doc = Document(
+            id_=path,
+            text=raw.decode("utf-8", errors="ignore"),
+            metadata={
+                "file_path": path,
+                "file_name": path.rpartition("/")[2],
+                "url": f"https://github.com/{owner}/{repo}/blob/{profile.ref}/{path}",
+            },
+        )
+        out.append((doc, _content_hash(raw)))
+    return out
+
+def _load_from_github(profile: Profile, persist_dir: Path) -> List[Tuple[Document, str]]:
+    token = os.environ.get("GITHUB_TOKEN")
+    owner, repo = profile.repo.split("/")[:2]
+    loaded = None
+    try:
+        # Tree + content-addressed blob cache: unchanged files cost no download
+        loaded = _github_tree_docs(profile, owner, repo, token, persist_dir)
+        if loaded is None:
+            warn("GitHub tree listing truncated; falling back to the repository reader.")
+    except Exception as e:
+        warn(f"GitHub tree fetch failed ({e}); falling back to the repository reader.")
+    if loaded is None:
+        loaded = _github_reader_docs(profile, owner, repo, token)
+    for d, _ in loaded:
+        # Both loaders report the repo-relative path in file_path (the reader's id_ is the
+        # blob SHA), so canonical paths and doc ids match whichever path built the index
+        cp = str(d.metadata.get("file_path") or d.id_).replace("\\", "/").lstrip("/")
+        d.id_ = cp
+        d.metadata["file_path"] = cp
+        d.metadata["canonical_path"] = cp
+        d.metadata["file_ext"] = _suffix(cp)
         d.metadata.setdefault("repo", profile.repo or "github")
-    return docs
+    return loaded
 
-def _load_from_local(profile: Profile) -> List[Document]:
-    base = Path(profile.path).resolve()
-    docs: List[Document] = []
-    for root, _, files in os.walk(base):
-        rel_top = Path(root).resolve().relative_to(base)
-        parts = list(rel_top.parts)
-        if parts and parts[0] not in profile.include:
+def _iter_files(
+    base: Path, include: frozenset, exts: frozenset, max_bytes: int
+) -> Iterator[Tuple[str, str, int, int]]:
+    """
+    Yield (path, canonical_path, size, mtime_ns) for files under `base` passing the filters.
+    Only top-level directories named in `include` are descended into. Walks with an explicit
+    stack of scandir calls; names and entry types are filtered before any stat.
+    """
+    stack: List[Tuple[str, str]] = [(str(base), "")]
+    while stack:
+        dir_path, rel = stack.pop()
+        try:
+            it = os.scandir(dir_path)
+        except OSError:
             continue
-        for f in files:
-            p = Path(root) / f
-            if p.suffix not in profile.ext:
-                continue
-            if p.stat().st_size > profile.max_file_size_kb * 1024:
-                continue
-            text = p.read_text(encoding="utf-8", errors="ignore")
-            canon = _canon_for_local(base, p)
-            d = Document(
-                text=text,
-                metadata={
-                    "file_path": str(p.resolve()),
-                    "canonical_path": canon,
-                    "repo": "local",
-                    "file_ext": p.suffix,
-                },
-            )
-            docs.append(d)
-    return docs
+        with it:
+            for entry in it:
+                name = entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if rel or name in include:
+                            stack.append((entry.path, rel + name + "/"))
+                        continue
+                    if os.path.splitext(name)[1] not in exts or not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                if st.st_size > max_bytes:
+                    continue
+                path = entry.path
+                if entry.is_symlink():
+                    # Symlinked files keep their resolved path and resolve()-based canonical path
+                    path = os.path.realpath(path)
+                    yield path, _canon_for_local(base, Path(path)), st.st_size, st.st_mtime_ns
+                else:
+                    yield path, rel + name, st.st_size, st.st_mtime_ns
+
+def _scan_local(profile: Profile) -> List[Tuple[Path, str, int, int]]:
+    """
+    Cheap first pass over a local checkout: (path, canonical_path, size, mtime_ns)
+    for every file passing the include/ext/size filters. No file contents are read.
+    """
+    base = Path(profile.path).resolve()
+    files = _iter_files(base, profile.include_set, profile.ext_set, profile.max_file_size_kb * 1024)
+    return [(Path(fp), canon, size, mtime_ns) for fp, canon, size, mtime_ns in files]
+
+def _read_local_doc(p: Path, canon: str) -> Tuple[Document, str]:
+    """
+    Read one file into a Document plus the content hash of its raw bytes (hashing releases the GIL).
+    `p` must already be absolute and resolved.
+    """
+    with open(p, "rb") as f:
+        raw = f.read()
+    # One decode; avoids read_text's incremental TextIOWrapper decoding
+    text = raw.decode("utf-8", errors="ignore")
+    doc = Document(
+        text=text,
+        metadata={
+            "file_path": str(p),
+            "canonical_path": canon,
+            "repo": "local",
+            "file_ext": p.suffix,
+        },
+    )
+    return doc, _content_hash(raw)
+
+def _load_from_local(
+    profile: Profile, stat_cache: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Tuple[Document, str]], Dict[str, Dict[str, Any]]]:
+    """
+    Load documents from a local checkout.
+    Returns ((document, content hash) pairs, stats) where stats maps
+    canonical_path -> {path, size, mtime_ns}. Files whose (size, mtime_ns) match
+    `stat_cache` are not read; their stats entry carries the cached "hash" instead
+    and they are absent from the pairs.
+    """
+    stat_cache = stat_cache or {}
+    stats: Dict[str, Dict[str, Any]] = {}
+    to_read: List[Tuple[Path, str]] = []
+    for p, canon, size, mtime_ns in _scan_local(profile):
+        entry: Dict[str, Any] = {"path": str(p), "size": size, "mtime_ns": mtime_ns}
+        cached = stat_cache.get(canon)
+        if cached and cached[0] == size and cached[1] == mtime_ns and cached[2]:
+            entry["hash"] = cached[2]
+        else:
+            to_read.append((p, canon))
+        stats[canon] = entry
+    # I/O-bound: oversubscribe cores, capped to stay within typical SSD queue depth
+    workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        docs = list(ex.map(lambda pc: _read_local_doc(*pc), to_read))
+    return docs, stats
+
+def _load_files_cache(persist_dir: Path) -> Dict[str, Any]:
+    fp = persist_dir / "files_cache.json"
+    if not fp.exists():
+        return {}
+    try:
+        return read_json(fp)
+    except Exception:
+        return {}
+
+def _save_files_cache(persist_dir: Path, stats: Dict[str, Dict[str, Any]], cur_files: Dict[str, Dict[str, Any]]) -> None:
+    """Persist canonical_path -> [size, mtime_ns, content hash] for local sources."""
+    cache = {
+        cp: [st["size"], st["mtime_ns"], cur_files[cp]["hash"]]
+        for cp, st in stats.items()
+        if cp in cur_files
+    }
+    write_json(persist_dir / "files_cache.json", cache)
 
-def _commit_sha_hint(profile: Profile) -> str:
-    return f"{profile.ref}@{datetime.utcnow().isoformat()}Z"
+def _commit_sha_hint(profile: Profile, ts: str) -> str:
+    return f"{profile.ref}@{ts}"
 
-def _sha256_text(s: str) -> str:
-    return hashlib.sha256(s.encode("utf-8", errors="ignore")).hexdigest()
+def _profile_snapshot(profile: Profile, strict: bool = False) -> Dict[str, Any]:
+    # Plain fields only (no computed fields), so the instance dict is already JSON-ready
+    if strict:
+        return profile.model_dump(mode="python", exclude_none=True)
+    return profile.__dict__.copy()
+
+def _content_hash(data: bytes) -> str:
+    # Change detection only; BLAKE3 is much faster when installed. Its digests are
+    # prefixed so switching environments reads as "changed" rather than colliding.
+    if blake3 is not None:
+        return "blake3:" + blake3.blake3(data).hexdigest()
+    return hashlib.sha256(data).hexdigest()
+
+def _text_hash(s: str) -> str:
+    return _content_hash(s.encode("utf-8", errors="ignore"))
 
 def _load_filemap(persist_dir: Path) -> Dict[str, Any]:
     fp = persist_dir / "filemap.json"
     if not fp.exists():
         return {"version": 1, "source": None, "files": {}}
     try:
-        raw = json.loads(fp.read_text(encoding="utf-8"))
+        raw = read_json_cached(fp)
         raw.setdefault("version", 1)
         raw.setdefault("source", None)
         raw.setdefault("files", {})
@@ -124,7 +328,10 @@ def _load_filemap(persist_dir: Path) -> Dict[str, Any]:
         return {"version": 1, "source": None, "files": {}}
 
 def _save_filemap(persist_dir: Path, fm: Dict[str, Any]) -> None:
-    (persist_dir / "filemap.json").write_text(json.dumps(fm, indent=2), encoding="utf-8")
+    # Sorted so the (often multi-MB) filemap diffs cleanly between builds
+    write_json(persist_dir / "filemap.json", fm, indent=True, sort_keys=True)
+    # The build may have mutated a cached parse; drop it along with the docstore's
+    json_cache_clear()
 
 def _get_node_id(node) -> str:
     return getattr(node, "node_id", None) or getattr(node, "id_", None)
@@ -136,47 +343,46 @@ def _load_existing_index(persist_dir: Path) -> Optional[VectorStoreIndex]:
     except Exception:
         return None
 
-def _source_fingerprint(profile: Profile) -> str:
-    if profile.path:
-        return f"local:{Path(profile.path).resolve()}"
-    if profile.repo:
-        return f"github:{profile.repo}@{profile.ref}"
+# persist_dir -> (docstore version, index); replaced in place after a re-index
+_LOADED_INDEXES: Dict[str, Tuple[str, VectorStoreIndex]] = {}
+_LOADED_LOCK = threading.Lock()
+
+def load_index_cached(persist_dir: Path) -> VectorStoreIndex:
+    """
+    Load a persisted index for querying, once per process.
+    Keyed on the docstore version so a re-index is picked up by long-running servers,
+    and the superseded index is released rather than kept alongside the new one.
+    """
+    version = docstore_version(persist_dir)
+    with _LOADED_LOCK:
+        hit = _LOADED_INDEXES.pop(str(persist_dir), None)
+        if hit is None or hit[0] != version:
+            hit = None  # drop the stale index before loading its replacement
+            storage_context = StorageContext.from_defaults(persist_dir=str(persist_dir))
+            hit = (version, load_index_from_storage(storage_context))
+        _LOADED_INDEXES[str(persist_dir)] = hit
+        while len(_LOADED_INDEXES) > 4:
+            _LOADED_INDEXES.pop(next(iter(_LOADED_INDEXES)))
+        return hit[1]
+
+@functools.lru_cache(maxsize=8)
+def _source_fingerprint_cached(path: Optional[str], repo: Optional[str], ref: str, cwd: Optional[str]) -> str:
+    if path:
+        return f"local:{Path(path).resolve()}"
+    if repo:
+        return f"github:{repo}@{ref}"
     return "unknown"
 
-def _read_docstore_nodes(persist_dir: Path) -> List[Dict[str, Any]]:
-    ds = persist_dir / "docstore.json"
-    if not ds.exists():
-        return []
-    try:
-        raw = json.loads(ds.read_text(encoding="utf-8"))
-    except Exception:
-        return []
-    container = None
-    if "docstore_data" in raw and isinstance(raw["docstore_data"], dict):
-        container = raw["docstore_data"]
-    elif "data" in raw and isinstance(raw["data"], dict):
-        container = raw["data"]
-    else:
-        return []
-    out = []
-    for _, node in container.items():
-        text = node.get("text") or node.get("node", {}).get("text") or ""
-        meta = node.get("metadata", {}) or node.get("node", {}).get("metadata", {})
-        nid = node.get("id_", None)
-        cpath = (meta.get("canonical_path") or meta.get("file_path") or "").replace("\\", "/")
-        out.append({"id": nid, "text": text, "metadata": meta, "canonical_path": cpath})
-    return out
+def _source_fingerprint(profile: Profile) -> str:
+    # Memoized: resolve() costs a syscall per path component. Relative paths also key on cwd.
+    cwd = os.getcwd() if profile.path and not os.path.isabs(profile.path) else None
+    return _source_fingerprint_cached(profile.path, profile.repo, profile.ref, cwd)
 
 def _bootstrap_filemap_if_missing(persist_dir: Path, filemap: Dict[str, Any], current_hashes_by_canon: Dict[str, str]) -> Dict[str, Any]:
     if filemap.get("files"):
         return filemap
-    nodes = _read_docstore_nodes(persist_dir)
-    if not nodes:
-        return filemap
     buckets: DefaultDict[str, List[str]] = defaultdict(list)
-    for n in nodes:
-        cp = n.get("canonical_path") or ""
-        nid = n.get("id")
+    for cp, nid in iter_docstore_paths(persist_dir):
         if cp and nid:
             buckets[cp].append(nid)
     if not buckets:
@@ -201,24 +407,302 @@ def _force_node_meta(node, dmeta: Dict[str, Any]) -> None:
     # write back
     node.metadata = nmeta
 
+def _split_one(splitter, d: Document) -> List[Any]:
+    try:
+        return splitter.get_nodes_from_documents([d])
+    except Exception as e:
+        warn(f"Split error in {d.metadata.get('file_path')}: {e}")
+        return [TextNode(
+            text=d.text,
+            metadata=dict(d.metadata),
+            relationships={NodeRelationship.SOURCE: d.as_related_node_info()},
+        )]
+
+def _split_batch(splitter, docs: List[Document]) -> Dict[str, List[Any]]:
+    """Split docs in one call; per-document fallback only if the batch fails."""
+    out: Dict[str, List[Any]] = {d.doc_id: [] for d in docs}
+    if not docs:
+        return out
+    try:
+        nodes = splitter.get_nodes_from_documents(docs)
+    except Exception:
+        for d in docs:
+            out[d.doc_id] = _split_one(splitter, d)
+        return out
+    for n in nodes:
+        out.setdefault(n.ref_doc_id, []).append(n)
+    return out
+
+# Below this many files a process pool costs more to start than it saves
+_MIN_POOL_FILES = 32
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    # Spawn, not fork: `watch` calls in from watchdog's threads, and a forked child can
+    # inherit locks those threads held (the default on macOS/Windows already)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def _extract_symbols_worker(item: Tuple[str, str, str]) -> List[Dict[str, Any]]:
+    path, canon, text = item
+    try:
+        rows = extract_python_symbols(Path(path), text)
+    except Exception:
+        return []
+    for r in rows:
+        r["canonical_path"] = canon
+    return rows
+
+def _extract_symbols(py_docs: List[Document], parallel: int = 1) -> List[Dict[str, Any]]:
+    """Extract python symbols; CPU-bound, so fan out across processes for larger inputs."""
+    py_inputs = [(d.metadata["file_path"], d.metadata.get("canonical_path", ""), d.text) for d in py_docs]
+    if parallel <= 1 or len(py_inputs) < _MIN_POOL_FILES:
+        return list(chain.from_iterable(map(_extract_symbols_worker, py_inputs)))
+    try:
+        with _process_pool(parallel) as ex:
+            return list(chain.from_iterable(ex.map(_extract_symbols_worker, py_inputs, chunksize=16)))
+    except Exception as e:
+        warn(f"Process pool unavailable ({e}); extracting symbols in threads.")
+        with ThreadPoolExecutor(max_workers=parallel) as ex:
+            return list(chain.from_iterable(ex.map(_extract_symbols_worker, py_inputs)))
+
+def _split_local(
+    docs: List[Document], chunk_lines: int, overlap: int, use_code: bool, symbol_workers: int
+) -> Tuple[Dict[str, List[Any]], List[Dict[str, Any]]]:
+    """Batched split in this process: one splitter call per kind (code vs text)."""
+    py_docs = [d for d in docs if use_code and d.metadata.get("file_ext") == ".py"]
+    py_ids = {d.doc_id for d in py_docs}
+    other_docs = [d for d in docs if d.doc_id not in py_ids]
+    by_id = _split_batch(_code_splitter(chunk_lines, overlap), py_docs) if py_docs else {}
+    by_id.update(_split_batch(_sentence_splitter(), other_docs))
+    return by_id, _extract_symbols(py_docs, symbol_workers)
+
+def _split_worker(
+    task: Tuple[List[Tuple[str, str, Dict[str, Any]]], int, int, bool]
+) -> Tuple[List[Tuple[str, List[Dict[str, Any]]]], List[Dict[str, Any]]]:
+    # Runs in a worker process: documents arrive as (id, text, metadata) and nodes
+    # leave as dicts, so no LlamaIndex objects are pickled.
+    items, chunk_lines, overlap, use_code = task
+    docs = [Document(id_=doc_id, text=text, metadata=meta) for doc_id, text, meta in items]
+    by_id, rows = _split_local(docs, chunk_lines, overlap, use_code, symbol_workers=1)
+    return [(doc_id, [n.to_dict() for n in nodes]) for doc_id, nodes in by_id.items()], rows
+
+def _split_in_pool(
+    docs: List[Document], profile: Profile, use_code: bool
+) -> Tuple[Dict[str, List[Any]], List[Dict[str, Any]]]:
+    items = [(d.doc_id, d.text, dict(d.metadata)) for d in docs]
+    # A few tasks per worker for load balancing, each still a batched split
+    size = max(8, -(-len(items) // (profile.parallel * 4)))
+    tasks = [
+        (items[i:i + size], profile.chunk_lines, profile.chunk_overlap, use_code)
+        for i in range(0, len(items), size)
+    ]
+    by_id: Dict[str, List[Any]] = {}
+    rows: List[Dict[str, Any]] = []
+    with _process_pool(profile.parallel) as ex:
+        for pairs, symbol_rows in ex.map(_split_worker, tasks):
+            for doc_id, node_dicts in pairs:
+                by_id[doc_id] = [TextNode.from_dict(nd) for nd in node_dicts]
+            rows.extend(symbol_rows)
+    return by_id, rows
+
+# Below this many documents, splitting in-process beats pool startup + pickling
+_MIN_SPLIT_POOL_DOCS = 50
+
+def _split_documents(
+    docs: List[Document], profile: Profile
+) -> Tuple[List[Tuple[Document, List[Any]]], List[Dict[str, Any]]]:
+    """
+    Split documents (batched per kind; across processes for larger inputs).
+    Returns ((doc, nodes) pairs in input order, python symbol rows).
+    """
+    _, _, use_code = _make_splitters(profile)
+    by_id: Optional[Dict[str, List[Any]]] = None
+    if profile.parallel > 1 and len(docs) >= _MIN_SPLIT_POOL_DOCS:
+        try:
+            by_id, symbol_rows = _split_in_pool(docs, profile, use_code)
+        except Exception as e:
+            warn(f"Process pool unavailable ({e}); splitting in-process.")
+    if by_id is None:
+        by_id, symbol_rows = _split_local(
+            docs, profile.chunk_lines, profile.chunk_overlap, use_code, profile.parallel
+        )
+
+    out: List[Tuple[Document, List[Any]]] = []
+    for d in docs:
+        nodes = by_id.get(d.doc_id, [])
+        # **Ensure canonical metadata is present on every node**
+        for n in nodes:
+            _force_node_meta(n, d.metadata)
+        out.append((d, nodes))
+    return out, symbol_rows
+
+def _prebuild_bm25(persist_dir: Path) -> None:
+    # The corpus only changes here, so pay for BM25 tokenization/IDF at index time, not per query
+    try:
+        bm25_rank.prebuild(persist_dir)
+    except Exception as e:
+        warn(f"BM25 prebuild skipped: {e}")
+
+def _write_manifest(
+    persist_dir: Path,
+    profile: Profile,
+    ts: str,
+    documents: int,
+    nodes: int,
+    symbols: int,
+    strict: bool = False,
+    docstore_blake2: Optional[str] = None,
+) -> Dict[str, Any]:
+    # Readers key their caches on this digest (docstore_version), so only the manifest is checked
+    manifest = {
+        "repo": profile.repo or profile.path,
+        "ref": profile.ref,
+        "commit_sha_hint": _commit_sha_hint(profile, ts),
+        "persist_dir": str(persist_dir),
+        "counts": {"documents": documents, "nodes": nodes, "symbols": symbols},
+        "created": ts,
+        "profile": _profile_snapshot(profile, strict),
+        "docstore_blake2": docstore_blake2 or docstore_digest(persist_dir),
+    }
+    write_json(persist_dir / "manifest.json", manifest, indent=True)
+    json_cache_clear()
+    return manifest
+
+def _previous_docstore_digest(persist_dir: Path) -> Optional[str]:
+    # Unchanged docstore: carry the recorded digest over instead of re-hashing the file
+    try:
+        return read_json_cached(persist_dir / "manifest.json").get("docstore_blake2")
+    except Exception:
+        return None
+
+def _chained_docstore_digest(persist_dir: Path, hashes: Dict[str, str], removed: Set[str]) -> Optional[str]:
+    """
+    New docstore version for a watch update without re-hashing docstore.json: the previous
+    digest folded with the delta (changed paths + content hashes, removed paths).
+    """
+    prev = _previous_docstore_digest(persist_dir)
+    if not prev:
+        return None
+    h = hashlib.blake2b(prev.encode(), digest_size=16)
+    for cp in sorted(hashes):
+        h.update(f"+{cp}\0{hashes[cp]}\n".encode())
+    for cp in sorted(removed):
+        h.update(f"-{cp}\n".encode())
+    return h.hexdigest()
+
+def _previous_symbols_count(persist_dir: Path) -> int:
+    try:
+        n = read_json_cached(persist_dir / "manifest.json")["counts"]["symbols"]
+        if isinstance(n, int):
+            return n
+    except Exception:
+        pass
+    return symbols_count_on_disk(persist_dir)
+
+def _apply_incremental(
+    index: VectorStoreIndex,
+    persist_dir: Path,
+    profile: Profile,
+    prev_files: Dict[str, Any],
+    docs: Dict[str, Document],
+    hashes: Dict[str, str],
+    stale_paths: Set[str],
+    source: str,
+) -> Tuple[Dict[str, Any], int, int]:
+    """
+    Apply a delta to a loaded index: drop nodes of `stale_paths` (modified + removed),
+    split/embed/insert `docs` (added + modified, keyed by canonical path), then persist
+    storage, filemap and symbol sidecars. Returns (filemap, nodes_count, symbols_count).
+    """
+    # Delete nodes for removed + modified files
+    to_delete_ids: List[str] = []
+    for pth in stale_paths:
+        ids = prev_files.get(pth, {}).get("node_ids", [])
+        to_delete_ids.extend(ids)
+    if to_delete_ids:
+        try:
+            index.delete_nodes(node_ids=to_delete_ids)
+        except Exception as e:
+            warn(f"delete_nodes failed ({len(to_delete_ids)} ids): {e}")
+
+    # Split & insert nodes for added + modified files
+    changed = list(docs)
+    split, new_symbol_rows = _split_documents([docs[cp] for cp in changed], profile)
+    apply_embedding_cache([n for _, nodes in split for n in nodes], persist_dir, profile.embed)
+    updated_entries: Dict[str, Any] = {}
+
+    # One insert for the whole delta (embeddings are already set above); per-file retry on failure
+    batch = [n for _, nodes in split for n in nodes]
+    try:
+        index.insert_nodes(batch)
+    except Exception as e:
+        warn(f"insert_nodes failed for the batch ({e}); retrying per file")
+        # The batch may have failed part-way: drop whatever landed so each node is inserted once
+        try:
+            index.delete_nodes(node_ids=[nid for nid in map(_get_node_id, batch) if nid], delete_from_docstore=True)
+        except Exception as e:
+            warn(f"delete_nodes failed for the partial batch: {e}")
+        for cp, (_, nodes) in zip(changed, split):
+            try:
+                index.insert_nodes(nodes)
+            except Exception as e:
+                warn(f"insert_nodes failed for {cp}: {e}")
+
+    for cp, (_, nodes) in zip(changed, split):
+        entry = {"hash": hashes[cp], "node_ids": []}
+        for n in nodes:
+            nid = _get_node_id(n)
+            if nid:
+                entry["node_ids"].append(nid)
+        updated_entries[cp] = entry
+
+    # Update filemap
+    new_map: Dict[str, Any] = {"version": 1, "source": source, "files": {}}
+    for cp, meta in prev_files.items():
+        if cp in stale_paths:
+            continue
+        new_map["files"][cp] = meta
+    for cp, meta in updated_entries.items():
+        new_map["files"][cp] = meta
+    _save_filemap(persist_dir, new_map)
+
+    # Update symbols sidecar (in place: only the spans of changed files are touched)
+    symbols_count = update_symbols(persist_dir, stale_paths, new_symbol_rows)
+
+    # Persist storage changes
+    index.storage_context.persist(persist_dir=str(persist_dir))
+
+    # counts from filemap
+    nodes_count = sum(len(v.get("node_ids", [])) for v in new_map["files"].values())
+    return new_map, nodes_count, symbols_count
+
 # ---------- main build ----------
 
-def build_index(profile: Profile, incremental: bool = True) -> Dict[str, Any]:
-    load_dotenv(".env")
-    _setup_llm()
+def build_index(profile: Profile, incremental: bool = True, strict_manifest: bool = False) -> Dict[str, Any]:
+    ts = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    setup_llm()
     _setup_embeddings(profile)
 
     persist_dir = Path(os.path.expanduser(profile.persist))
     ensure_dir(persist_dir)
 
+    # Load existing filemap and handle source changes
+    filemap = _load_filemap(persist_dir)
+    desired_source = _source_fingerprint(profile)
+    if filemap.get("source") and filemap["source"] != desired_source:
+        warn(f"Source changed from '{filemap['source']}' to '{desired_source}'. For safety, doing full rebuild.")
+        incremental = False
+
     # Load documents
     info("Loading repository...")
+    file_stats: Dict[str, Dict[str, Any]] = {}
     if profile.path:
-        documents = _load_from_local(profile)
+        # Unchanged files (same size + mtime) are only re-read when actually needed
+        stat_cache = _load_files_cache(persist_dir) if incremental and filemap.get("files") else None
+        loaded, file_stats = _load_from_local(profile, stat_cache)
         source_mode = "local"
         base_for_local = Path(profile.path).resolve()
     elif profile.repo:
-        documents = _load_from_github(profile)
+        loaded = _load_from_github(profile, persist_dir)
         source_mode = "github"
         base_for_local = None
     else:
@@ -227,7 +711,11 @@ def build_index(profile: Profile, incremental: bool = True) -> Dict[str, Any]:
     # Compute per-file current hashes keyed by canonical path
     cur_files: Dict[str, Dict[str, Any]] = {}
     current_hashes_by_canon: Dict[str, str] = {}
-    for d in documents:
+    for cp, st in file_stats.items():
+        if "hash" in st:
+            cur_files[cp] = {"hash": st["hash"], "doc": None}
+            current_hashes_by_canon[cp] = st["hash"]
+    for d, fh in loaded:
         meta = d.metadata
         if "canonical_path" not in meta:
             fp = meta.get("file_path") or getattr(d, "id_", "")
@@ -235,18 +723,17 @@ def build_index(profile: Profile, incremental: bool = True) -> Dict[str, Any]:
                 meta["canonical_path"] = _canon_for_local(base_for_local, Path(fp))
             else:
                 meta["canonical_path"] = str(fp).replace("\\", "/")
-        meta["file_ext"] = meta.get("file_ext") or Path(meta["canonical_path"]).suffix
+        meta["file_ext"] = meta.get("file_ext") or _suffix(meta["canonical_path"])
         cpath = meta["canonical_path"]
-        fh = _sha256_text(d.text)
         cur_files[cpath] = {"hash": fh, "doc": d}
         current_hashes_by_canon[cpath] = fh
 
-    # Load existing filemap and handle source changes
-    filemap = _load_filemap(persist_dir)
-    desired_source = _source_fingerprint(profile)
-    if filemap.get("source") and filemap["source"] != desired_source:
-        warn(f"Source changed from '{filemap['source']}' to '{desired_source}'. For safety, doing full rebuild.")
-        incremental = False
+    def _doc(cp: str) -> Document:
+        # Materialize a document skipped by the stat cache
+        entry = cur_files[cp]
+        if entry["doc"] is None:
+            entry["doc"], _ = _read_local_doc(Path(file_stats[cp]["path"]), cp)
+        return entry["doc"]
 
     # Bootstrap filemap if needed (existing docstore but no filemap)
     if incremental and (persist_dir / "docstore.json").exists() and not filemap.get("files"):
@@ -269,28 +756,21 @@ def build_index(profile: Profile, incremental: bool = True) -> Dict[str, Any]:
                 modified_paths.add(pth)
         if not (added_paths or modified_paths or removed_paths):
             info("No changes detected; index is up to date.")
-            # counts from filemap (reliable) + symbols sidecar
+            # counts from filemap (reliable) + the previous manifest's symbol count
             nodes_count = sum(len(v.get("node_ids", [])) for v in prev_files.values())
-            symbols_count = 0
-            sp = persist_dir / "symbols.jsonl"
-            if sp.exists():
-                symbols_count = sum(1 for _ in sp.open())
-            manifest = {
-                "repo": profile.repo or profile.path,
-                "ref": profile.ref,
-                "commit_sha_hint": _commit_sha_hint(profile),
-                "persist_dir": str(persist_dir),
-                "counts": {"documents": len(documents), "nodes": nodes_count, "symbols": symbols_count},
-                "created": datetime.utcnow().isoformat() + "Z",
-                "profile": profile.model_dump(),
-            }
-            (persist_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+            symbols_count = _previous_symbols_count(persist_dir)
+            manifest = _write_manifest(
+                persist_dir, profile, ts, len(cur_files), nodes_count, symbols_count, strict_manifest,
+                docstore_blake2=_previous_docstore_digest(persist_dir),
+            )
             # ensure source + hashes present
             filemap["source"] = desired_source
             for cp, meta in filemap.get("files", {}).items():
                 if not meta.get("hash") and cp in current_hashes_by_canon:
                     meta["hash"] = current_hashes_by_canon[cp]
             _save_filemap(persist_dir, filemap)
+            if file_stats:
+                _save_files_cache(persist_dir, file_stats, cur_files)
             return manifest
     else:
         added_paths = set(cur_files.keys())
@@ -306,26 +786,12 @@ def build_index(profile: Profile, incremental: bool = True) -> Dict[str, Any]:
     if index is None:
         # -------- fresh build --------
         info("Creating new index storage...")
-        sent, code, use_code = _make_splitters(profile)
+        split, symbol_rows = _split_documents([_doc(cp) for cp in cur_files], profile)
         all_nodes = []
-        symbol_rows = []
-        for d in documents:
-            try:
-                if use_code and d.metadata.get("file_ext") == ".py":
-                    nodes = code.get_nodes_from_documents([d])  # type: ignore
-                    symbol_rows.extend(extract_python_symbols(Path(d.metadata["file_path"]), d.text))
-                else:
-                    nodes = sent.get_nodes_from_documents([d])
-            except Exception as e:
-                warn(f"Split error in {d.metadata.get('file_path')}: {e}")
-                nodes = [Document(text=d.text, metadata=d.metadata).as_related_node()]
-
-            # **Ensure canonical metadata is present on every node**
-            for n in nodes:
-                _force_node_meta(n, d.metadata)
-
+        for _, nodes in split:
             all_nodes.extend(nodes)
 
+        apply_embedding_cache(all_nodes, persist_dir, profile.embed, prune=True)
         index = VectorStoreIndex(all_nodes)
         index.storage_context.persist(persist_dir=str(persist_dir))
 
@@ -343,12 +809,10 @@ def build_index(profile: Profile, incremental: bool = True) -> Dict[str, Any]:
         _save_filemap(persist_dir, new_map)
 
         # Symbols sidecar
-        if symbol_rows:
-            (persist_dir / "symbols.jsonl").write_text("\n".join(json.dumps(r) for r in symbol_rows), encoding="utf-8")
+        symbols_count = write_symbols(persist_dir, symbol_rows)
 
         # counts (robust)
         nodes_count = len(all_nodes)
-        symbols_count = len(symbol_rows)
 
     else:
         # -------- incremental update --------
@@ -358,99 +822,142 @@ def build_index(profile: Profile, incremental: bool = True) -> Dict[str, Any]:
             sample = list(sorted(added_paths))[:5]
             warn(f"Added sample (first 5): {sample}")
 
-        # Delete nodes for removed + modified files
-        to_delete_ids: List[str] = []
-        for pth in removed_paths | modified_paths:
-            ids = prev_files.get(pth, {}).get("node_ids", [])
-            to_delete_ids.extend(ids)
-        if to_delete_ids:
-            try:
-                index.delete_nodes(node_ids=to_delete_ids)
-            except Exception as e:
-                warn(f"delete_nodes failed ({len(to_delete_ids)} ids): {e}")
+        changed = sorted(list(added_paths | modified_paths))
+        new_map, nodes_count, symbols_count = _apply_incremental(
+            index,
+            persist_dir,
+            profile,
+            prev_files,
+            {cp: _doc(cp) for cp in changed},
+            {cp: cur_files[cp]["hash"] for cp in changed},
+            modified_paths | removed_paths,
+            desired_source,
+        )
 
-        # Split & insert nodes for added + modified files
-        sent, code, use_code = _make_splitters(profile)
-        new_symbol_rows: List[Dict[str, Any]] = []
-        updated_entries: Dict[str, Any] = {}
+    # Final manifest (records the docstore digest that the BM25 prebuild keys on)
+    manifest = _write_manifest(
+        persist_dir, profile, ts, len(cur_files), nodes_count, symbols_count, strict_manifest
+    )
+    _prebuild_bm25(persist_dir)
+    if file_stats:
+        _save_files_cache(persist_dir, file_stats, cur_files)
+    info(f"Done. Persisted index at {persist_dir}")
+    return manifest
 
-        for cp in sorted(list(added_paths | modified_paths)):
-            d = cur_files[cp]["doc"]
-            try:
-                if use_code and d.metadata.get("file_ext") == ".py":
-                    nodes = code.get_nodes_from_documents([d])  # type: ignore
-                    new_symbol_rows.extend(extract_python_symbols(Path(d.metadata["file_path"]), d.text))
-                else:
-                    nodes = sent.get_nodes_from_documents([d])
-            except Exception as e:
-                warn(f"Split error in {cp}: {e}")
-                nodes = [Document(text=d.text, metadata=d.metadata).as_related_node()]
 
-            # **Ensure canonical metadata is present on every node**
-            for n in nodes:
-                _force_node_meta(n, d.metadata)
 
-            try:
-                index.insert_nodes(nodes)
-            except Exception as e:
-                warn(f"insert_nodes failed for {cp}: {e}")
+# ---------- watch: per-file update ----------
 
-            entry = {"hash": cur_files[cp]["hash"], "node_ids": []}
-            for n in nodes:
-                nid = _get_node_id(n)
-                if nid:
-                    entry["node_ids"].append(nid)
-            updated_entries[cp] = entry
-
-        # Update filemap
-        new_map = {"version": 1, "source": desired_source, "files": {}}
-        for cp, meta in prev_files.items():
-            if cp in removed_paths or cp in modified_paths:
-                continue
-            new_map["files"][cp] = meta
-        for cp, meta in updated_entries.items():
-            new_map["files"][cp] = meta
-        _save_filemap(persist_dir, new_map)
+def _local_rel(base: Path, p: Path) -> Optional[str]:
+    """`p` relative to the resolved `base` ("/"-separated), or None if outside it."""
+    # Resolve like base, so events reported through a symlinked path still match
+    rel = os.path.relpath(p.resolve(), base)
+    if rel.startswith(".."):
+        return None
+    return rel.replace("\\", "/")
 
-        # Update symbols sidecar
-        symp = persist_dir / "symbols.jsonl"
-        if symp.exists():
-            existing = [json.loads(line) for line in symp.read_text(encoding="utf-8").splitlines() if line.strip()]
-            existing = [
-                r for r in existing
-                if (r.get("canonical_path", r.get("file_path")) not in modified_paths)
-                and (r.get("canonical_path", r.get("file_path")) not in removed_paths)
-            ]
-        else:
-            existing = []
-        if new_symbol_rows:
-            existing.extend(new_symbol_rows)
-        if existing:
-            symp.write_text("\n".join(json.dumps(r) for r in existing), encoding="utf-8")
-        elif symp.exists():
-            symp.unlink(missing_ok=True)
-
-        # Persist storage changes
-        index.storage_context.persist(persist_dir=str(persist_dir))
+def _local_canon_if_indexed(base: Path, p: Path, profile: Profile) -> Optional[str]:
+    """Canonical path of `p` if it falls under the profile's include/ext filters, else None."""
+    canon = _local_rel(base, p)
+    if canon is None:
+        return None
+    top, sep, _ = canon.partition("/")
+    if sep and top not in profile.include_set:
+        return None
+    if os.path.splitext(canon)[1] not in profile.ext_set:
+        return None
+    return canon
 
-        # counts from filemap
-        nodes_count = sum(len(v.get("node_ids", [])) for v in new_map["files"].values())
-        symbols_count = 0
-        sp = persist_dir / "symbols.jsonl"
-        if sp.exists():
-            symbols_count = sum(1 for _ in sp.open())
+def update_files(profile: Profile, paths: Iterable[str], strict_manifest: bool = False) -> Dict[str, Any]:
+    """
+    Re-index only `paths` (local files or directories reported as changed, e.g. by `watch`).
+    Unchanged content is skipped by hash; deleted files (or directories) drop their nodes. Falls back to a
+    full `build_index` when there is no compatible index to update yet.
+    """
+    persist_dir = Path(os.path.expanduser(profile.persist))
+    filemap = _load_filemap(persist_dir)
+    if (
+        not profile.path
+        or not filemap.get("files")
+        or filemap.get("source") != _source_fingerprint(profile)
+        or not (persist_dir / "docstore.json").exists()
+    ):
+        return build_index(profile, strict_manifest=strict_manifest)
+
+    ts = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    base = Path(profile.path).resolve()
+    max_size = profile.max_file_size_kb * 1024
+    prev_files: Dict[str, Any] = filemap["files"]
+    stat_cache = _load_files_cache(persist_dir)
+
+    docs: Dict[str, Document] = {}
+    hashes: Dict[str, str] = {}
+    removed: Set[str] = set()
+    files: Set[Path] = set()
+    cache_dirty = False
+    for raw in set(paths):
+        p = Path(raw)
+        if p.is_dir():
+            # Directory created or moved in: its files may not get events of their own
+            files.update(Path(root, name) for root, _, names in os.walk(p) for name in names)
+            continue
+        files.add(p)
+        if not p.exists():
+            # A vanished directory (deleted or moved away): drop everything indexed under it
+            rel = _local_rel(base, p)
+            if rel and rel != ".":
+                removed.update(cp for cp in prev_files if cp.startswith(rel + "/"))
+    for p in sorted(files):
+        canon = _local_canon_if_indexed(base, p, profile)
+        if canon is None:
+            continue
+        try:
+            st = p.stat()
+        except OSError:
+            st = None
+        if st is None or not p.is_file() or st.st_size > max_size:
+            if canon in prev_files:
+                removed.add(canon)
+            if stat_cache.pop(canon, None) is not None:
+                cache_dirty = True
+            continue
+        d, h = _read_local_doc(p.resolve(), canon)
+        entry = [st.st_size, st.st_mtime_ns, h]
+        if stat_cache.get(canon) != entry:
+            stat_cache[canon] = entry
+            cache_dirty = True
+        if prev_files.get(canon, {}).get("hash") != h:
+            docs[canon] = d
+            hashes[canon] = h
+    for canon in removed:
+        if stat_cache.pop(canon, None) is not None:
+            cache_dirty = True
+
+    if not (docs or removed):
+        info("No content changes; index is up to date.")
+        if cache_dirty:
+            write_json(persist_dir / "files_cache.json", stat_cache)
+        mf = persist_dir / "manifest.json"
+        return read_json(mf) if mf.exists() else {}
+
+    setup_llm()
+    _setup_embeddings(profile)
+    index = _load_existing_index(persist_dir)
+    if index is None:
+        warn("Existing storage failed to load; falling back to full rebuild.")
+        return build_index(profile, incremental=False, strict_manifest=strict_manifest)
 
-    # Final manifest
-    manifest = {
-        "repo": profile.repo or profile.path,
-        "ref": profile.ref,
-        "commit_sha_hint": _commit_sha_hint(profile),
-        "persist_dir": str(persist_dir),
-        "counts": {"documents": len(documents), "nodes": nodes_count, "symbols": symbols_count},
-        "created": datetime.utcnow().isoformat() + "Z",
-        "profile": profile.model_dump(),
-    }
-    (persist_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    modified = {cp for cp in docs if cp in prev_files}
+    info(f"Updating {len(docs)} file(s), removing {len(removed)}")
+    new_map, nodes_count, symbols_count = _apply_incremental(
+        index, persist_dir, profile, prev_files, docs, hashes, modified | removed, filemap["source"]
+    )
+    write_json(persist_dir / "files_cache.json", stat_cache)
+    # Runs on every save: skip the full docstore digest and BM25 refit. The new version marks
+    # BM25 stale, and the next hybrid query refits it once (bm25.load_corpus).
+    manifest = _write_manifest(
+        persist_dir, profile, ts, len(new_map["files"]), nodes_count, symbols_count, strict_manifest,
+        docstore_blake2=_chained_docstore_digest(persist_dir, hashes, modified | removed),
+    )
     info(f"Done. Persisted index at {persist_dir}")
     return manifest
-
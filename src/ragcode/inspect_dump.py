@@ -1,107 +1,26 @@
 from __future__ import annotations
-import json
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List
 
-from dotenv import load_dotenv
-from llama_index.core import StorageContext, load_index_from_storage
+from . import bm25 as bm25_rank
+from .config import load_env_once
+from .docstore import load_node_texts
+from .jsonio import read_json_cached, write_jsonl
 
-from .embeddings import setup_embeddings_from_string  # NEW
+# Heavy imports (llama_index, numpy, BM25 backends) are function-local (or deferred in
+# ragcode.bm25) so that `ragcode inspect`, which only reads manifest.json, starts instantly.
 
-try:
-    from rank_bm25 import BM25Okapi
-except Exception:
-    BM25Okapi = None  # optional dependency
 
-
-def _read_docstore(persist_dir: Path) -> Dict[str, Any]:
+def _bm25_topk(persist_dir: Path, query: str, k: int) -> List[Dict[str, Any]]:
     """
-    Read LlamaIndex simple_kvstore docstore. Supports common 0.13.x shapes:
-    - {"docstore_data": { id: { "id_":..., "text":..., "metadata": {...} } }}
-    - {"data": { id: { "id_":..., "text":..., "metadata": {...} } }}   (simple_kvstore)
+    Score docstore rows with BM25 and return the top-k. Falls back to a simple heuristic if
+    BM25 not present. Ranks the same corpus as `query --hybrid`, sharing its persisted model.
     """
-    docstore_path = persist_dir / "docstore.json"
-    if not docstore_path.exists():
-        return {}
-    try:
-        return json.loads(docstore_path.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
-
-
-def _extract_text_meta(obj: Any) -> Tuple[str, Dict[str, Any]]:
-    """
-    Given a value from the kvstore, pull out (text, metadata).
-    Handles both top-level and nested under "node".
-    Returns ("", {}) if nothing usable is present.
-    """
-    if not isinstance(obj, dict):
-        return "", {}
-
-    # Common case: top-level text / metadata (TextNode serialization)
-    text = obj.get("text")
-    meta = obj.get("metadata")
-    if isinstance(text, str) and text:
-        return text, meta if isinstance(meta, dict) else {}
-
-    # Nested under "node" (older/other shapes)
-    node = obj.get("node")
-    if isinstance(node, dict):
-        text = node.get("text")
-        meta = node.get("metadata")
-        if isinstance(text, str) and text:
-            return text, meta if isinstance(meta, dict) else {}
-
-    # Some shapes store under "data" or other wrapper; try one more layer
-    data = obj.get("data")
-    if isinstance(data, dict):
-        text = data.get("text")
-        meta = data.get("metadata")
-        if isinstance(text, str) and text:
-            return text, meta if isinstance(meta, dict) else {}
-
-    return "" , {}
-
-
-def _load_nodes_for_dump(persist_dir: Path) -> List[Dict[str, Any]]:
-    """
-    Produce a list of {"text": str, "metadata": dict} for all nodes in docstore.
-    Works against LI 0.13.6 simple_kvstore. (Fallback path used only if retriever fails.)
-    """
-    raw = _read_docstore(persist_dir)
-    container = None
-    if "docstore_data" in raw and isinstance(raw["docstore_data"], dict):
-        container = raw["docstore_data"]
-    elif "data" in raw and isinstance(raw["data"], dict):
-        container = raw["data"]
-    else:
-        return []
-
-    out: List[Dict[str, Any]] = []
-    for _, val in container.items():
-        text, meta = _extract_text_meta(val)
-        if text:
-            if not isinstance(meta, dict):
-                meta = {}
-            out.append({"text": text, "metadata": meta})
-    return out
-
-
-def _bm25_topk(nodes: List[Dict[str, Any]], query: str, k: int) -> List[Dict[str, Any]]:
-    """
-    Score nodes with BM25 and return the top-k. Falls back to a simple heuristic if BM25 not present.
-    """
-    if not nodes:
-        return []
-
-    if BM25Okapi is not None:
-        corpus = [n["text"].split() for n in nodes]
-        bm25 = BM25Okapi(corpus)
-        scores = bm25.get_scores(query.split())
-        order = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:k]
-        return [nodes[i] for i in order]
+    if bm25_rank.available():
+        return bm25_rank.search(persist_dir, query, k)
 
     # Fallback: pick nodes with any query token, else first k
+    nodes = load_node_texts(persist_dir)
     terms = [t for t in query.lower().split() if len(t) > 2]
     picked = []
     for n in nodes:
@@ -115,11 +34,16 @@ def _bm25_topk(nodes: List[Dict[str, Any]], query: str, k: int) -> List[Dict[str
     return picked
 
 
+def _bm25_fallback(persist_dir: Path, query: str, k: int) -> List[Dict[str, Any]]:
+    """Docstore + BM25, for when the retriever returns nothing."""
+    return [{"text": r["text"], "metadata": {"file_path": r["file_path"]}} for r in _bm25_topk(persist_dir, query, k)]
+
+
 def inspect_index(persist_dir: Path) -> str:
     manifest = persist_dir / "manifest.json"
     if not manifest.exists():
         return f"No manifest found at {persist_dir}."
-    data = json.loads(manifest.read_text(encoding="utf-8"))
+    data = read_json_cached(manifest)
     lines = [
         f"Repo: {data.get('repo')}",
         f"Ref: {data.get('ref')}",
@@ -138,7 +62,7 @@ def _load_manifest_embed(persist_dir: Path) -> str | None:
     if not mf.exists():
         return None
     try:
-        data = json.loads(mf.read_text(encoding="utf-8"))
+        data = read_json_cached(mf)
         prof = data.get("profile") or {}
         return prof.get("embed")
     except Exception:
@@ -149,7 +73,9 @@ def _prepare_embeddings_for_retrieval(persist_dir: Path) -> None:
     """
     Ensure Settings.embed_model matches the model used at index time.
     """
-    load_dotenv(".env")
+    from .embeddings import setup_embeddings_from_string
+
+    load_env_once()
     embed_spec = _load_manifest_embed(persist_dir)
     setup_embeddings_from_string(embed_spec)
 
@@ -164,8 +90,8 @@ def _retrieve_topk_via_index(persist_dir: Path, query: str, k: int) -> List[Dict
     # CRITICAL: align embedding backend before loading the index/retriever
     _prepare_embeddings_for_retrieval(persist_dir)
 
-    storage = StorageContext.from_defaults(persist_dir=str(persist_dir))
-    index = load_index_from_storage(storage)
+    from .indexer import load_index_cached  # local import: keeps `inspect` light
+    index = load_index_cached(persist_dir)
     retriever = index.as_retriever(similarity_top_k=k)
     nodes = retriever.retrieve(query)
     out: List[Dict[str, Any]] = []
@@ -185,8 +111,7 @@ def dump_snippets_md(persist_dir: Path, query: str, k: int, out_path: Path) -> P
 
     # 2) If retriever returned nothing (should be rare), try docstore+BM25 as a fallback
     if not topk:
-        nodes = _load_nodes_for_dump(persist_dir)
-        topk = _bm25_topk(nodes, query, k)
+        topk = _bm25_fallback(persist_dir, query, k)
 
     with out_path.open("w", encoding="utf-8") as f:
         f.write(f"# Context pack for: {query}\n\n")
@@ -214,8 +139,7 @@ def dump_snippets_jsonl(persist_dir: Path, query: str, k: int, out_path: Path) -
     # Same retrieval-first logic for JSONL
     topk = _retrieve_topk_via_index(persist_dir, query, k)
     if not topk:
-        nodes = _load_nodes_for_dump(persist_dir)
-        topk = _bm25_topk(nodes, query, k)
+        topk = _bm25_fallback(persist_dir, query, k)
 
     if not topk:
         # last resort: single synthesized answer line
@@ -227,9 +151,6 @@ def dump_snippets_jsonl(persist_dir: Path, query: str, k: int, out_path: Path) -
         except Exception:
             pass
 
-    lines = []
-    for n in topk:
-        lines.append({"role": "system", "content": n["text"], "metadata": n["metadata"]})
-    out_path.write_text("\n".join(json.dumps(x) for x in lines), encoding="utf-8")
+    write_jsonl(out_path, ({"role": "system", "content": n["text"], "metadata": n["metadata"]} for n in topk))
     return out_path
 
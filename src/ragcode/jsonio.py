@@ -0,0 +1,72 @@
+from __future__ import annotations
+import functools
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Iterable
+
+# Optional: orjson is several times faster than stdlib json for our sidecars
+try:
+    import orjson
+except Exception:
+    orjson = None  # optional dependency
+
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes (2-space indent / sorted keys if requested)."""
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys).encode("utf-8")
+
+
+# Above this size, parse straight from a read-only mapping instead of a bytes copy
+_MMAP_MIN_BYTES = 1 << 20
+
+
+def read_json(path: Path) -> Any:
+    with path.open("rb") as f:
+        if orjson is not None and os.fstat(f.fileno()).st_size >= _MMAP_MIN_BYTES:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
+        return loads(f.read())
+
+
+@functools.lru_cache(maxsize=8)
+def _read_json_at(path_str: str, mtime_ns: int, size: int) -> Any:
+    return read_json(Path(path_str))
+
+
+def read_json_cached(path: Path) -> Any:
+    """
+    read_json memoized on (path, mtime_ns, size). The parsed object is shared between
+    callers: treat it as read-only unless the file is rewritten right after.
+    """
+    st = path.stat()
+    return _read_json_at(str(path), st.st_mtime_ns, st.st_size)
+
+
+def cache_clear() -> None:
+    _read_json_at.cache_clear()
+
+
+def write_json(path: Path, obj: Any, indent: bool = False, sort_keys: bool = False) -> None:
+    path.write_bytes(dumps(obj, indent=indent, sort_keys=sort_keys))
+
+
+def write_jsonl(path: Path, rows: Iterable[Any]) -> int:
+    """Stream rows to a JSONL file without building the whole body in memory; returns the row count."""
+    n = 0
+    with path.open("wb", buffering=1 << 20) as f:
+        for r in rows:
+            f.write(dumps(r))
+            f.write(b"\n")
+            n += 1
+    return n
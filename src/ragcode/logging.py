@@ -1,10 +1,24 @@
+import os
+
 from rich.console import Console
 from rich.theme import Theme
 
 _console = Console(theme=Theme({"good": "green", "warn": "yellow", "bad": "red"}))
 
-def info(msg: str): _console.print(f"[good]ℹ[/] {msg}")
-def warn(msg: str): _console.print(f"[warn]![/] {msg}")
-def err(msg: str):  _console.print(f"[bad]✖[/] {msg}")
-def console() -> Console: return _console
+if _console.is_terminal:
+    def info(msg: str): _console.print(f"[good]ℹ[/] {msg}")
+    def warn(msg: str): _console.print(f"[warn]![/] {msg}")
+    def err(msg: str):  _console.print(f"[bad]✖[/] {msg}")
+else:
+    # Piped/redirected: styling is never seen, so skip rich's markup parsing and wrapping
+    def info(msg: str): print(f"ℹ {msg}", file=_console.file)
+    def warn(msg: str): print(f"! {msg}", file=_console.file)
+    def err(msg: str):  print(f"✖ {msg}", file=_console.file)
 
+# Diagnostics for expected no-ops; shown only with RAGCODE_DEBUG set
+if os.environ.get("RAGCODE_DEBUG"):
+    def debug(msg: str): print(f"· {msg}", file=_console.file)
+else:
+    def debug(msg: str): pass
+
+def console() -> Console: return _console
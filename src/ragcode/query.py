@@ -1,89 +1,44 @@
 from __future__ import annotations
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List, Optional
-from dotenv import load_dotenv
-from llama_index.core import load_index_from_storage, StorageContext, Settings
-from llama_index.core.query_engine import CitationQueryEngine
-from llama_index.llms.openai import OpenAI
-from rank_bm25 import BM25Okapi
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from . import bm25 as bm25_rank
+from .config import load_env_once
 from .logging import info
-from .embeddings import setup_embeddings_from_string
+from .jsonio import read_json_cached
 import json
 
-# Optional: sentence-transformers reranker (if enabled in profile)
-try:
-    from llama_index.core.postprocessor import SentenceTransformerRerank  # available in LI 0.13.x
-except Exception:
-    SentenceTransformerRerank = None  # type: ignore
-
-
-def _setup_llm():
-    Settings.llm = OpenAI(model="gpt-4o-mini")
+# LlamaIndex, the OpenAI client and sentence-transformers are imported inside the functions
+# that need them, so importing this module (e.g. at API server startup) stays cheap.
 
 
 def _load_index(persist_dir: Path):
-    storage_context = StorageContext.from_defaults(persist_dir=str(persist_dir))
-    index = load_index_from_storage(storage_context)
-    return index
+    from .indexer import load_index_cached
+
+    return load_index_cached(persist_dir)
 
 
 def _load_manifest(persist_dir: Path) -> Dict[str, Any]:
-    mf = persist_dir / "manifest.json"
-    if not mf.exists():
-        return {}
+    # Memoized on (mtime_ns, size): repeated queries don't re-read an unchanged manifest
     try:
-        return json.loads(mf.read_text(encoding="utf-8"))
+        return read_json_cached(persist_dir / "manifest.json")
     except Exception:
         return {}
 
 
-def _load_manifest_embed(persist_dir: Path) -> Optional[str]:
-    data = _load_manifest(persist_dir)
-    prof = data.get("profile") or {}
-    return prof.get("embed")
-
-
-def _load_manifest_reranker(persist_dir: Path) -> Optional[str]:
-    data = _load_manifest(persist_dir)
-    prof = data.get("profile") or {}
-    return (prof.get("reranker") or "none").lower()
+def _load_manifest_models(persist_dir: Path) -> Tuple[Optional[str], str]:
+    """(embed spec, reranker name) recorded at index time, from one manifest read."""
+    prof = _load_manifest(persist_dir).get("profile") or {}
+    return prof.get("embed"), (prof.get("reranker") or "none").lower()
 
 
-def _load_nodes_texts(persist_dir: Path) -> List[Dict[str, Any]]:
-    # LlamaIndex persists nodes in docstore.json; we'll read it to build BM25 corpus
-    docstore_path = persist_dir / "docstore.json"
-    if not docstore_path.exists():
+def _bm25_hits(persist_dir: Path, query: str, top_k: int) -> List[Dict[str, Any]]:
+    if not bm25_rank.available():
         return []
-    data = json.loads(docstore_path.read_text(encoding="utf-8"))
-    # Handle common shapes ("docstore_data" or "data")
-    container = None
-    if "docstore_data" in data and isinstance(data["docstore_data"], dict):
-        container = data["docstore_data"]
-    elif "data" in data and isinstance(data["data"], dict):
-        container = data["data"]
-    else:
-        return []
-    result = []
-    for _, node in container.items():
-        text = (
-            node.get("text")
-            or node.get("node", {}).get("text")
-            or ""
-        )
-        meta = node.get("metadata", {}) or node.get("node", {}).get("metadata", {})
-        result.append({"text": text, "metadata": meta, "ref_id": node.get("id_", "")})
-    return result
-
-
-def _bm25_candidates(query: str, nodes: List[Dict[str, Any]], top_k: int) -> List[int]:
-    if not nodes:
-        return []
-    tokenized_corpus = [n["text"].split() for n in nodes]
-    bm25 = BM25Okapi(tokenized_corpus)
-    scores = bm25.get_scores(query.split())
-    idxs = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:top_k]
-    return idxs
+    # Corpus + model are loaded once per docstore version (in memory + persist_dir/bm25/)
+    return bm25_rank.search(persist_dir, query, top_k)
 
 
 def _maybe_make_reranker(reranker_name: str | None):
@@ -93,62 +48,75 @@ def _maybe_make_reranker(reranker_name: str | None):
     """
     if not reranker_name or reranker_name in {"", "none"}:
         return None
-    if SentenceTransformerRerank is None:
-        return None
     # Sensible default if user sets 'bge' or 'default'
     if reranker_name in {"default", "bge"}:
         model = "BAAI/bge-reranker-large"
     else:
         model = reranker_name
     try:
-        return SentenceTransformerRerank(model=model, top_n=10)
+        return _get_reranker(model, 10)
     except Exception:
         return None
 
 
+@functools.lru_cache(maxsize=4)
+def _get_reranker(model: str, top_n: int):
+    # Loading the cross-encoder is the expensive part: once per (model, top_n) per process
+    # Optional: sentence-transformers reranker (if enabled in profile)
+    from llama_index.core.postprocessor import SentenceTransformerRerank  # available in LI 0.13.x
+
+    return SentenceTransformerRerank(model=model, top_n=top_n)
+
+
+_FLATTEN = str.maketrans("\n", " ")
+
+
+def _source_row(i: int, sws, snippet_chars: int = 240) -> str:
+    node = getattr(sws, "node", sws)
+    score = getattr(sws, "score", None)
+    meta = getattr(node, "metadata", {}) or {}
+    fp = meta.get("file_path", meta.get("id_", "?"))
+    # Short snippet: truncate before flattening newlines
+    try:
+        content = node.get_content(metadata_mode="none")
+    except Exception:
+        content = getattr(node, "text", "") or ""
+    snippet = content[:snippet_chars].translate(_FLATTEN)
+    if score is None:
+        return f"> {i}. `{fp}` — {snippet} …\n"
+    return f"> {i}. `{fp}` (score={score:.3f}) — {snippet} …\n"
+
+
 def _format_sources_md(response, top_n: int = 8) -> str:
     """
     Build a human-friendly citations block from response.source_nodes,
     showing file_path, score, and a short snippet.
     """
-    if not hasattr(response, "source_nodes") or not response.source_nodes:
+    sources = getattr(response, "source_nodes", None)
+    if not sources:
         return ""
-    lines = ["**Sources**:\n"]
-    for i, sws in enumerate(response.source_nodes[:top_n], 1):
-        node = getattr(sws, "node", sws)
-        score = getattr(sws, "score", None)
-        meta = getattr(node, "metadata", {}) or {}
-        fp = meta.get("file_path", meta.get("id_", "?"))
-        # Short snippet
-        snippet = ""
-        try:
-            snippet = node.get_content(metadata_mode="none")[:240].replace("\n", " ")
-        except Exception:
-            snippet = (getattr(node, "text", "") or "")[:240].replace("\n", " ")
-        if score is None:
-            lines.append(f"> {i}. `{fp}` — {snippet} …\n")
-        else:
-            lines.append(f"> {i}. `{fp}` (score={score:.3f}) — {snippet} …\n")
-    return "\n".join(lines)
+    rows = [_source_row(i, sws) for i, sws in enumerate(sources[:top_n], 1)]
+    return "\n".join(["**Sources**:\n", *rows])
 
 
-def query_index(
-    persist_dir: Path,
-    query_str: str,
-    k: int = 5,
-    citations: bool = True,
-    hybrid: bool = True,
-    format_: str = "md",
-) -> Dict[str, Any]:
-    load_dotenv(".env")
+def build_engine(persist_dir: Path, k: int = 5, streaming: bool = False):
+    """
+    CitationQueryEngine over the persisted index, using the LLM, embedding backend and
+    reranker recorded at index time. Long-running callers can build once and reuse it.
+    With streaming=True, query() returns a response whose `response_gen` yields tokens.
+    """
+    from llama_index.core.query_engine import CitationQueryEngine
+    from .embeddings import setup_embeddings_from_string
+    from .indexer import setup_llm
+
+    load_env_once()
 
     # Ensure LLM + the SAME embedding backend used at index time (read from manifest)
-    _setup_llm()
-    embed_spec = _load_manifest_embed(persist_dir)
+    setup_llm()
+    embed_spec, reranker_name = _load_manifest_models(persist_dir)
     setup_embeddings_from_string(embed_spec)
 
     # Optional reranker from profile
-    reranker_name = _load_manifest_reranker(persist_dir)
     reranker = _maybe_make_reranker(reranker_name)
 
     index = _load_index(persist_dir)
@@ -158,34 +126,53 @@ def query_index(
     if reranker is not None:
         node_postprocessors.append(reranker)
 
-    engine = CitationQueryEngine.from_args(
+    return CitationQueryEngine.from_args(
         index,
         similarity_top_k=k,
         citation_chunk_size=512,
         node_postprocessors=node_postprocessors,
+        streaming=streaming,
     )
 
-    # Optional hybrid prefetch (BM25) — still just for debug visibility
+
+def _md_tail(response, bm25_hits: List[Dict[str, Any]], k: int, citations: bool) -> List[str]:
+    """Markdown that follows the answer: citations, then the BM25 debug block."""
+    parts: List[str] = []
+    if citations:
+        parts.append(_format_sources_md(response, top_n=k))
+    if bm25_hits:
+        parts.append("\n<details><summary>BM25 candidates (debug)</summary>\n\n")
+        parts.extend(f"- {h['file_path']}\n" for h in bm25_hits[:k])
+        parts.append("\n</details>\n")
+    return parts
+
+
+def query_index(
+    persist_dir: Path,
+    query_str: str,
+    k: int = 5,
+    citations: bool = True,
+    hybrid: bool = True,
+    format_: str = "md",
+    engine=None,
+) -> Dict[str, Any]:
+    if engine is None:
+        engine = build_engine(persist_dir, k)
+
+    # Optional hybrid prefetch (BM25) — still just for debug visibility. It is independent
+    # of the engine, so run it alongside the embedding/LLM round-trips.
     if hybrid:
-        nodes = _load_nodes_texts(persist_dir)
-        bm25_idxs = _bm25_candidates(query_str, nodes, top_k=max(k, 8))
-        bm25_hits = [nodes[i] for i in bm25_idxs]
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            bm25_future = ex.submit(_bm25_hits, persist_dir, query_str, max(k, 8))
+            response = engine.query(query_str)
+            bm25_hits = bm25_future.result()
     else:
+        response = engine.query(query_str)
         bm25_hits = []
-
-    response = engine.query(query_str)
     text = str(response)
 
     if format_ == "md":
-        body = f"{text}\n\n"
-        if citations:
-            body += _format_sources_md(response, top_n=k) or ""
-        if bm25_hits:
-            body += "\n<details><summary>BM25 candidates (debug)</summary>\n\n"
-            for h in bm25_hits[:k]:
-                fp = h["metadata"].get("file_path", "?")
-                body += f"- {fp}\n"
-            body += "\n</details>\n"
+        body = "".join([f"{text}\n\n", *_md_tail(response, bm25_hits, k, citations)])
         return {"format": "md", "content": body}
 
     elif format_ == "jsonl":
@@ -199,3 +186,25 @@ def query_index(
     else:
         return {"format": "raw", "content": text}
 
+
+def stream_query_md(
+    persist_dir: Path,
+    query_str: str,
+    k: int = 5,
+    citations: bool = True,
+    hybrid: bool = True,
+    engine=None,
+) -> Iterator[str]:
+    """
+    Same Markdown as query_index(format_="md"), yielded as the LLM produces it: answer
+    tokens first, then citations and the BM25 block. `engine` must be a streaming one.
+    """
+    if engine is None:
+        engine = build_engine(persist_dir, k, streaming=True)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        bm25_future = ex.submit(_bm25_hits, persist_dir, query_str, max(k, 8)) if hybrid else None
+        response = engine.query(query_str)
+        yield from response.response_gen
+        yield "\n\n"
+        bm25_hits = bm25_future.result() if bm25_future is not None else []
+    yield from _md_tail(response, bm25_hits, k, citations)
@@ -1,17 +1,27 @@
 from __future__ import annotations
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Literal, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, field_validator
 
 from .config import load_profile
-from .query import query_index
 from .explain_where import explain_symbol, where_symbol
 
+# Optional: orjson-backed responses (C encoder); stdlib JSONResponse otherwise
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except Exception:
+    DefaultResponse = JSONResponse  # optional dependency
 
-app = FastAPI(title="ragcode API", version="0.1.1")
+
+app = FastAPI(title="ragcode API", version="0.1.1", default_response_class=DefaultResponse)
+
+
+_FORMAT_ALIASES = {"markdown": "md", "json": "jsonl"}
 
 
 class QueryReq(BaseModel):
@@ -25,14 +35,18 @@ class QueryReq(BaseModel):
     k: int = 5
     citations: bool = True
     hybrid: bool = True
-    format: str = "md"
+    # Checked by pydantic-core itself (and listed as an enum in the OpenAPI schema)
+    format: Literal["md", "jsonl", "raw"] = "md"
+    # md only: stream text/markdown as the answer is generated instead of one JSON body
+    stream: bool = False
 
-    @field_validator("format")
+    @field_validator("format", mode="before")
     @classmethod
-    def _fmt(cls, v: str) -> str:
-        v = (v or "md").lower()
-        if v not in {"md", "jsonl", "raw"}:
-            raise ValueError("format must be one of: md, jsonl, raw")
+    def _normalize_format(cls, v: Any) -> Any:
+        # Case-insensitive, with the spelled-out names clients tend to send
+        if isinstance(v, str):
+            v = v.strip().lower()
+            return _FORMAT_ALIASES.get(v, v)
         return v
 
 
@@ -53,9 +67,46 @@ def _resolve_persist_dir(persist_dir: Optional[str], profile: Optional[str], loc
     raise HTTPException(status_code=422, detail="Either 'persist_dir' or 'profile' must be provided.")
 
 
+# (persist_dir, k, streaming) -> (docstore version, engine). One slot per key, replaced
+# after a re-index, so superseded engines (and their loaded indexes) are released.
+_ENGINES: Dict[Tuple[str, int, bool], Tuple[str, Any]] = {}
+_ENGINES_LOCK = threading.Lock()
+# Per-key build locks: concurrent requests for one key build once, other keys aren't blocked
+_BUILD_LOCKS: Dict[Tuple[str, int, bool], threading.Lock] = {}
+MAX_ENGINES = 8
+
+
+def _get_engine(persist: Path, k: int, streaming: bool = False):
+    """Query engine per (persist_dir, k, streaming), built once per process and rebuilt after a re-index."""
+    from .docstore import docstore_version
+    from .query import build_engine  # local import: LlamaIndex loads on the first query, not at startup
+
+    key = (str(persist), k, streaming)
+    version = docstore_version(persist)
+    with _ENGINES_LOCK:
+        hit = _ENGINES.get(key)
+        if hit is not None and hit[0] == version:
+            _ENGINES[key] = _ENGINES.pop(key)  # most recently used
+            return hit[1]
+        build_lock = _BUILD_LOCKS.setdefault(key, threading.Lock())
+    with build_lock:
+        with _ENGINES_LOCK:
+            hit = _ENGINES.pop(key, None)
+        if hit is None or hit[0] != version:
+            hit = None  # drop the stale engine before building its replacement
+            hit = (version, build_engine(persist, k, streaming=streaming))
+        with _ENGINES_LOCK:
+            _ENGINES[key] = hit
+            while len(_ENGINES) > MAX_ENGINES:
+                old = next(iter(_ENGINES))
+                del _ENGINES[old]
+                _BUILD_LOCKS.pop(old, None)
+        return hit[1]
+
+
 @app.get("/", include_in_schema=False)
 def root():
-    return JSONResponse({
+    return DefaultResponse({
         "name": "ragcode API",
         "version": "0.1.1",
         "endpoints": {
@@ -76,8 +127,15 @@ def healthz():
 
 @app.post("/query")
 def api_query(req: QueryReq):
+    from .query import query_index, stream_query_md
+
     persist = _resolve_persist_dir(req.persist_dir, req.profile, req.local_config)
-    return query_index(persist, req.query, req.k, req.citations, req.hybrid, req.format)
+    if req.stream and req.format == "md":
+        engine = _get_engine(persist, req.k, streaming=True)
+        chunks = stream_query_md(persist, req.query, req.k, req.citations, req.hybrid, engine=engine)
+        return StreamingResponse(chunks, media_type="text/markdown")
+    engine = _get_engine(persist, req.k)
+    return query_index(persist, req.query, req.k, req.citations, req.hybrid, req.format, engine=engine)
 
 
 @app.post("/explain")
@@ -104,5 +162,6 @@ def api_inspect(req: InspectReq):
     manifest = persist / "manifest.json"
     if not manifest.exists():
         raise HTTPException(status_code=404, detail=f"manifest.json not found in {persist}")
-    return JSONResponse((manifest.read_text(encoding="utf-8")))
+    # Already JSON on disk: stream the file as-is instead of parsing and re-encoding it
+    return FileResponse(manifest, media_type="application/json")
 
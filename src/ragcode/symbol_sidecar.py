@@ -0,0 +1,163 @@
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set
+
+from .jsonio import dumps, loads, read_json, write_json
+
+# symbols.jsonl is append-only between compactions. symbols_index.json maps each
+# canonical path to the byte span [offset, length, rows] of its (contiguous) rows, so an
+# incremental update blanks stale spans in place (one '#' line of equal length) and
+# appends new rows at EOF instead of re-parsing and rewriting the whole file.
+SYMBOLS_FILE = "symbols.jsonl"
+BY_NAME_FILE = "symbols_by_name.json"
+INDEX_FILE = "symbols_index.json"
+
+# Rewrite the file once tombstones make up more than this share of its bytes
+COMPACT_RATIO = 0.3
+
+
+def _row_path(r: Dict[str, Any]) -> str:
+    return r.get("canonical_path", r.get("file_path")) or ""
+
+
+def _group(rows: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    by_path: Dict[str, List[Dict[str, Any]]] = {}
+    for r in rows:
+        by_path.setdefault(_row_path(r), []).append(r)
+    return by_path
+
+
+def _append(f: BinaryIO, by_path: Dict[str, List[Dict[str, Any]]], spans: Dict[str, List[int]]) -> int:
+    n = 0
+    for cp, rows in by_path.items():
+        start = f.tell()
+        for r in rows:
+            f.write(dumps(r))
+            f.write(b"\n")
+        spans[cp] = [start, f.tell() - start, len(rows)]
+        n += len(rows)
+    return n
+
+
+def _remove_all(persist_dir: Path) -> None:
+    for name in (SYMBOLS_FILE, BY_NAME_FILE, INDEX_FILE):
+        (persist_dir / name).unlink(missing_ok=True)
+
+
+def _load_index(persist_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        idx = read_json(persist_dir / INDEX_FILE)
+    except Exception:
+        return None
+    return idx if isinstance(idx, dict) and idx.get("version") == 1 else None
+
+
+def iter_symbol_rows(symp: Path) -> Iterator[Dict[str, Any]]:
+    """Live rows of a symbols.jsonl, skipping tombstones."""
+    with symp.open("rb") as f:
+        for line in f:
+            if line.strip() and not line.startswith(b"#"):
+                yield loads(line)
+
+
+def save_symbols_by_name(persist_dir: Path, rows: Iterable[Dict[str, Any]]) -> None:
+    """Sidecar keyed by symbol name so explain/where are a dict lookup."""
+    by_name: Dict[str, List[Dict[str, Any]]] = {}
+    for r in rows:
+        by_name.setdefault(r["symbol"], []).append(r)
+    write_json(persist_dir / BY_NAME_FILE, by_name)
+
+
+def write_symbols(persist_dir: Path, rows: List[Dict[str, Any]]) -> int:
+    """(Re)write all symbol sidecars from scratch; returns the row count."""
+    if not rows:
+        _remove_all(persist_dir)
+        return 0
+    spans: Dict[str, List[int]] = {}
+    with (persist_dir / SYMBOLS_FILE).open("wb", buffering=1 << 20) as f:
+        live = _append(f, _group(rows), spans)
+    write_json(persist_dir / INDEX_FILE, {"version": 1, "live": live, "dead_bytes": 0, "files": spans})
+    save_symbols_by_name(persist_dir, rows)
+    return live
+
+
+def _patch_by_name(
+    persist_dir: Path,
+    removed: List[Dict[str, Any]],
+    dropped: Set[str],
+    new_rows: List[Dict[str, Any]],
+) -> None:
+    try:
+        by_name = read_json(persist_dir / BY_NAME_FILE)
+    except Exception:
+        save_symbols_by_name(persist_dir, iter_symbol_rows(persist_dir / SYMBOLS_FILE))
+        return
+    # Only names that lost rows need filtering
+    for name in {r["symbol"] for r in removed}:
+        kept = [r for r in by_name.get(name, []) if _row_path(r) not in dropped]
+        if kept:
+            by_name[name] = kept
+        else:
+            by_name.pop(name, None)
+    for r in new_rows:
+        by_name.setdefault(r["symbol"], []).append(r)
+    write_json(persist_dir / BY_NAME_FILE, by_name)
+
+
+def update_symbols(persist_dir: Path, stale_paths: Set[str], new_rows: List[Dict[str, Any]]) -> int:
+    """
+    Drop rows of `stale_paths` and add `new_rows`, touching only the affected spans.
+    Falls back to a full rewrite for indexes without a span index. Returns the live row count.
+    """
+    symp = persist_dir / SYMBOLS_FILE
+    idx = _load_index(persist_dir) if symp.exists() else None
+    if idx is None:
+        rows = [r for r in iter_symbol_rows(symp) if _row_path(r) not in stale_paths] if symp.exists() else []
+        rows.extend(new_rows)
+        return write_symbols(persist_dir, rows)
+
+    spans: Dict[str, List[int]] = idx["files"]
+    by_path = _group(new_rows)
+    dropped = {cp for cp in stale_paths | set(by_path) if cp in spans}
+    removed: List[Dict[str, Any]] = []
+    with symp.open("r+b") as f:
+        for cp in dropped:
+            off, length, count = spans.pop(cp)
+            f.seek(off)
+            removed.extend(loads(line) for line in f.read(length).splitlines() if line.strip())
+            f.seek(off)
+            f.write(b"#" + b" " * (length - 2) + b"\n")
+            idx["live"] -= count
+            idx["dead_bytes"] += length
+        f.seek(0, os.SEEK_END)
+        idx["live"] += _append(f, by_path, spans)
+        size = f.tell()
+
+    if idx["live"] <= 0:
+        _remove_all(persist_dir)
+        return 0
+    if idx["dead_bytes"] > COMPACT_RATIO * size:
+        return write_symbols(persist_dir, list(iter_symbol_rows(symp)))
+    write_json(persist_dir / INDEX_FILE, idx)
+    _patch_by_name(persist_dir, removed, dropped, new_rows)
+    return idx["live"]
+
+
+def symbols_count(persist_dir: Path) -> int:
+    idx = _load_index(persist_dir)
+    if idx is not None:
+        return idx["live"]
+    # No span index means no tombstones: count newlines a block at a time
+    symp = persist_dir / SYMBOLS_FILE
+    n = 0
+    last = b"\n"
+    try:
+        with symp.open("rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                n += block.count(b"\n")
+                last = block[-1:]
+    except OSError:
+        return 0
+    # Older writers joined rows without a trailing newline
+    return n + (last != b"\n")
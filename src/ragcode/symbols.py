@@ -1,28 +1,83 @@
 from __future__ import annotations
 import ast
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 
-def extract_python_symbols(path: Path, text: str) -> List[Dict[str, Any]]:
-    """Very lightweight symbol extractor for Python (functions/classes)."""
+# (path, is-text, blake2b of the source) -> rows; bounded LRU. Keyed on content rather than the
+# text itself so cached entries don't pin whole files in memory.
+_CACHE_SIZE = 4096
+_cache: "OrderedDict[Tuple[str, bool, bytes], List[Dict[str, Any]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Definitions only ever appear in statement lists, never inside expressions
+_STMT_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+
+class _SymCollector(ast.NodeVisitor):
+    """Collects class/function defs (nested ones included) without descending into expressions."""
+
+    def __init__(self, path: Path) -> None:
+        self.file_path = str(path)
+        self.out: List[Dict[str, Any]] = []
+
+    def _add(self, node: Any, kind: str) -> None:
+        lineno = getattr(node, "lineno", None)
+        self.out.append({
+            "symbol": node.name,
+            "kind": kind,
+            "start_line": lineno,
+            "end_line": getattr(node, "end_lineno", lineno),
+            "file_path": self.file_path,
+            "language": "python",
+        })
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._add(node, "class")
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        self._add(node, "function")
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def generic_visit(self, node: ast.AST) -> None:
+        for field in _STMT_FIELDS:
+            stmts = getattr(node, field, None)
+            if isinstance(stmts, list):
+                for child in stmts:
+                    self.visit(child)
+
+
+def _extract(path: Path, source: Union[str, bytes]) -> List[Dict[str, Any]]:
     try:
-        tree = ast.parse(text)
+        # We never read type comments. Decoded text is parsed as-is: re-encoding it to
+        # bytes would let a PEP 263 coding cookie (e.g. latin-1) decode it a second time.
+        tree = ast.parse(source, filename=str(path), type_comments=False)
     except Exception:
         return []
-    out: List[Dict[str, Any]] = []
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-            name = node.name
-            lineno = getattr(node, "lineno", None)
-            end_lineno = getattr(node, "end_lineno", lineno)
-            kind = "class" if isinstance(node, ast.ClassDef) else "function"
-            out.append({
-                "symbol": name,
-                "kind": kind,
-                "start_line": lineno,
-                "end_line": end_lineno,
-                "file_path": str(path),
-                "language": "python",
-            })
-    return out
+    collector = _SymCollector(path)
+    collector.visit(tree)
+    return collector.out
 
+def extract_python_symbols(path: Path, source: Union[str, bytes]) -> List[Dict[str, Any]]:
+    """
+    Very lightweight symbol extractor for Python (functions/classes); memoized on content.
+    `source` may be the raw file bytes (coding cookie honored) or already-decoded text.
+    """
+    data = source.encode("utf-8", errors="surrogatepass") if isinstance(source, str) else source
+    key = (str(path), isinstance(source, str), hashlib.blake2b(data, digest_size=16).digest())
+    with _cache_lock:
+        rows: Optional[List[Dict[str, Any]]] = _cache.get(key)
+        if rows is not None:
+            _cache.move_to_end(key)
+    if rows is None:
+        rows = _extract(path, source)
+        with _cache_lock:
+            _cache[key] = rows
+            if len(_cache) > _CACHE_SIZE:
+                _cache.popitem(last=False)
+    # Callers annotate rows (e.g. canonical_path): hand out copies
+    return [dict(r) for r in rows]
@@ -0,0 +1,10 @@
+import json
+
+from ragcode import bm25
+
+
+def test_prebuild_skips_an_empty_corpus(tmp_path):
+    (tmp_path / "docstore.json").write_text(json.dumps({"docstore_data": {"n1": {"id_": "n1", "text": ""}}}))
+    assert bm25.prebuild(tmp_path) is False
+    # Nothing fitted, so no model state is written
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["docstore.json"]
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from ragcode import docstore
+
+
+def _write_docstore(persist_dir, key="docstore_data"):
+    nodes = {
+        "n1": {"id_": "n1", "text": "def f(): pass", "metadata": {"canonical_path": "pkg/a.py", "file_path": "/x/pkg/a.py"}},
+        "n2": {"id_": "n2", "text": "x", "metadata": {"file_path": "pkg\\b.py"}},
+        "n3": {"id_": "n3", "node": {"text": "y", "metadata": {"canonical_path": "c.md"}}},
+        "n4": {"id_": "n4", "text": "", "metadata": {}},
+    }
+    (persist_dir / "docstore.json").write_text(json.dumps({key: nodes}))
+
+
+@pytest.mark.parametrize("key", docstore.CONTAINER_KEYS)
+def test_iter_docstore_paths_streaming_matches_in_memory(tmp_path, monkeypatch, key):
+    pytest.importorskip("ijson")
+    _write_docstore(tmp_path, key)
+    in_memory = list(docstore.iter_docstore_paths(tmp_path))
+    assert in_memory == [("pkg/a.py", "n1"), ("pkg/b.py", "n2"), ("c.md", "n3"), ("", "n4")]
+
+    monkeypatch.setattr(docstore, "STREAM_THRESHOLD_BYTES", 0)
+    assert list(docstore.iter_docstore_paths(tmp_path)) == in_memory
+    assert [nid for nid, _ in docstore.iter_docstore(tmp_path)] == ["n1", "n2", "n3", "n4"]
+
+
+def test_missing_docstore_yields_nothing(tmp_path):
+    assert list(docstore.iter_docstore_paths(tmp_path)) == []
@@ -0,0 +1,77 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from llama_index.core.schema import MetadataMode, TextNode
+
+from ragcode import embed_cache
+from ragcode.embed_cache import apply_embedding_cache
+
+
+class _Embedder:
+    def __init__(self):
+        self.calls = []
+
+    def get_text_embedding_batch(self, texts, show_progress=False):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    fake = _Embedder()
+    monkeypatch.setattr(embed_cache, "Settings", SimpleNamespace(embed_model=fake))
+    return fake
+
+
+def _node(text, **meta):
+    return TextNode(text=text, metadata=meta)
+
+
+def _key(node):
+    return embed_cache._content_key(node.get_content(metadata_mode=MetadataMode.EMBED))
+
+
+def _rows(persist_dir):
+    con = sqlite3.connect(str(persist_dir / "embed_cache.sqlite"))
+    try:
+        return [h for (h,) in con.execute("SELECT hash FROM embeddings ORDER BY rowid")]
+    finally:
+        con.close()
+
+
+def test_hit_skips_the_embed_call(tmp_path, embedder):
+    apply_embedding_cache([_node("a"), _node("bb")], tmp_path, "m")
+    nodes = [_node("a"), _node("bb")]
+    apply_embedding_cache(nodes, tmp_path, "m")
+    assert len(embedder.calls) == 1
+    assert [n.embedding for n in nodes] == [[1.0, 1.0], [2.0, 1.0]]
+
+
+def test_changed_text_metadata_or_model_misses(tmp_path, embedder):
+    apply_embedding_cache([_node("a", file_path="x.py")], tmp_path, "m")
+    apply_embedding_cache([_node("b", file_path="x.py")], tmp_path, "m")
+    apply_embedding_cache([_node("a", file_path="y.py")], tmp_path, "m")
+    apply_embedding_cache([_node("a", file_path="x.py")], tmp_path, "other")
+    assert len(embedder.calls) == 4
+
+
+def test_prune_drops_unreferenced_rows(tmp_path, embedder):
+    apply_embedding_cache([_node("a"), _node("b"), _node("c")], tmp_path, "m")
+    apply_embedding_cache([_node("a")], tmp_path, "other")
+    keep = _node("b")
+    apply_embedding_cache([keep], tmp_path, "m", prune=True)
+    assert len(embedder.calls) == 2
+    assert _rows(tmp_path) == [_key(keep)]
+
+
+def test_cap_evicts_oldest_rows_first(tmp_path, embedder, monkeypatch):
+    monkeypatch.setattr(embed_cache, "MAX_CACHE_ROWS", 3)
+    old = [_node("a"), _node("b")]
+    new = [_node("c"), _node("d"), _node("e")]
+    apply_embedding_cache(old, tmp_path, "m")
+    apply_embedding_cache(new, tmp_path, "m")
+    assert sorted(_rows(tmp_path)) == sorted(_key(n) for n in new)
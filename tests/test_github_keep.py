@@ -0,0 +1,18 @@
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from ragcode.config import Profile
+from ragcode.indexer import _github_keep
+
+
+def test_github_keep_matches_include_dirs_by_component():
+    profile = Profile(name="t", include=["src", "docs/"], ext=[".py", ".md"], max_file_size_kb=1)
+    keep = _github_keep(profile)
+    assert keep("src/pkg/a.py", 10)
+    assert keep("docs/index.md", 10)
+    # top-level files and look-alike prefixes are not part of an include dir
+    assert not keep("README.md", 10)
+    assert not keep("src_old/a.py", 10)
+    assert not keep("src/a.txt", 10)
+    assert not keep("src/big.py", 2048)
@@ -0,0 +1,19 @@
+import pytest
+
+pytest.importorskip("httpx")
+
+from ragcode.github_tree import _blob_path, _prune_cache
+
+
+def test_prune_cache_keeps_only_live_blobs(tmp_path):
+    for sha in ("aa11", "aa22", "bb33"):
+        fp = _blob_path(tmp_path, sha)
+        fp.parent.mkdir(exist_ok=True)
+        fp.write_bytes(sha.encode())
+    (tmp_path / "aa" / ".aa99.tmp").write_bytes(b"partial")
+
+    _prune_cache(tmp_path, {"aa22"})
+
+    assert _blob_path(tmp_path, "aa22").read_bytes() == b"aa22"
+    assert sorted(p.name for p in (tmp_path / "aa").iterdir()) == ["aa22"]
+    assert not (tmp_path / "bb").exists()
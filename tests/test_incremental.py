@@ -0,0 +1,63 @@
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from llama_index.core import Document, StorageContext, VectorStoreIndex
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.core.schema import TextNode
+
+from ragcode import indexer
+from ragcode.config import Profile
+
+
+def _nodes(cp, n):
+    return [TextNode(id_=f"{cp}#{i}", text=f"{cp} chunk {i}", embedding=[0.1] * 8) for i in range(n)]
+
+
+def test_batch_insert_failure_retries_each_file_once(tmp_path, monkeypatch):
+    docs = {cp: Document(id_=cp, text=cp, metadata={"canonical_path": cp}) for cp in ("a.py", "b.py", "c.py")}
+    split = [(docs[cp], _nodes(cp, k)) for cp, k in (("a.py", 2), ("b.py", 3), ("c.py", 1))]
+    monkeypatch.setattr(indexer, "_split_documents", lambda d, p: (split, []))
+    monkeypatch.setattr(indexer, "apply_embedding_cache", lambda *a, **kw: None)
+
+    index = VectorStoreIndex([], storage_context=StorageContext.from_defaults(), embed_model=MockEmbedding(embed_dim=8))
+    real_insert = index.insert_nodes
+    calls = []
+
+    def flaky_insert(nodes, **kw):
+        calls.append([n.node_id for n in nodes])
+        if len(calls) == 1:
+            # Part of the batch lands before the failure
+            real_insert(nodes[:3], **kw)
+            raise RuntimeError("boom")
+        real_insert(nodes, **kw)
+
+    monkeypatch.setattr(index, "insert_nodes", flaky_insert)
+    # Dict-backed stores would hide duplicates: count live copies per node id instead
+    live = Counter()
+    store_cls = type(index.vector_store)
+    real_add, real_delete = store_cls.add, store_cls.delete_nodes
+
+    def add(self, nodes, **kw):
+        live.update(n.node_id for n in nodes)
+        return real_add(self, nodes, **kw)
+
+    def delete_nodes(self, node_ids=None, **kw):
+        live.subtract({nid: 1 for nid in node_ids or [] if live[nid] > 0})
+        return real_delete(self, node_ids, **kw)
+
+    monkeypatch.setattr(store_cls, "add", add)
+    monkeypatch.setattr(store_cls, "delete_nodes", delete_nodes)
+    fm, nodes_count, _ = indexer._apply_incremental(
+        index, tmp_path, Profile(name="t"), {}, docs, {cp: "h" for cp in docs}, set(), "local"
+    )
+
+    per_file = [[n.node_id for n in nodes] for _, nodes in split]
+    assert calls[1:] == per_file
+    all_ids = sorted(nid for ids in per_file for nid in ids)
+    assert sorted(index.index_struct.nodes_dict) == all_ids
+    assert sorted(index.vector_store.data.embedding_dict) == all_ids
+    assert +live == Counter(all_ids)
+    assert nodes_count == 6 and {cp: e["node_ids"] for cp, e in fm["files"].items()} == dict(zip(docs, per_file))
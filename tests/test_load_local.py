@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from llama_index.core import Settings
+from llama_index.core.embeddings import MockEmbedding
+
+from ragcode import indexer
+from ragcode.config import Profile
+
+
+def _repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    for name, text in (("a.py", "a = 1\n"), ("b.py", "b = 1\n"), ("c.py", "c = 1\n")):
+        (repo / "src" / name).write_text(text)
+    return repo
+
+
+def _bump_mtime(p):
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_stat_cache_skips_unchanged_files(tmp_path, monkeypatch):
+    repo = _repo(tmp_path)
+    profile = Profile(name="t", path=str(repo), include=["src"], ext=[".py"])
+    docs, stats = indexer._load_from_local(profile)
+    first = {d.metadata["canonical_path"]: h for d, h in docs}
+    cache = {cp: [st["size"], st["mtime_ns"], first[cp]] for cp, st in stats.items()}
+
+    _bump_mtime(repo / "src/a.py")  # touched only
+    (repo / "src/b.py").write_text("b = 2\n")  # same size, new content
+    _bump_mtime(repo / "src/b.py")
+
+    read = []
+    real_read = indexer._read_local_doc
+    monkeypatch.setattr(indexer, "_read_local_doc", lambda p, canon: read.append(canon) or real_read(p, canon))
+    docs, stats = indexer._load_from_local(profile, cache)
+
+    assert sorted(read) == ["src/a.py", "src/b.py"]
+    assert stats["src/c.py"]["hash"] == cache["src/c.py"][2]
+    hashes = {d.metadata["canonical_path"]: h for d, h in docs}
+    assert hashes["src/a.py"] == cache["src/a.py"][2] and hashes["src/b.py"] != cache["src/b.py"][2]
+
+
+def test_incremental_build_reindexes_only_the_rewritten_file(tmp_path, monkeypatch):
+    repo = _repo(tmp_path)
+    monkeypatch.setattr(indexer, "setup_llm", lambda *a, **kw: None)
+    monkeypatch.setattr(indexer, "_setup_embeddings", lambda p: setattr(Settings, "embed_model", MockEmbedding(embed_dim=8)))
+    profile = Profile(name="t", path=str(repo), persist=str(tmp_path / "index"), include=["src"], ext=[".py"], embed="mock", parallel=1)
+    indexer.build_index(profile)
+
+    _bump_mtime(repo / "src/a.py")
+    (repo / "src/b.py").write_text("b = 2\n")
+    _bump_mtime(repo / "src/b.py")
+
+    split = []
+    real_split = indexer._split_documents
+    monkeypatch.setattr(indexer, "_split_documents", lambda docs, p: split.extend(d.metadata["canonical_path"] for d in docs) or real_split(docs, p))
+    indexer.build_index(profile)
+    assert split == ["src/b.py"]
+    # The touched file's new mtime is recorded, so the next build doesn't read it again
+    cache = indexer._load_files_cache(Path(profile.persist))
+    assert cache["src/a.py"][1] == (repo / "src/a.py").stat().st_mtime_ns
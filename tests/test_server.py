@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from ragcode import docstore, query, server
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    monkeypatch.setattr(server, "_ENGINES", {})
+    monkeypatch.setattr(server, "_BUILD_LOCKS", {})
+    versions = {}
+    built = []
+    monkeypatch.setattr(docstore, "docstore_version", lambda p: versions.get(str(p), "v1"))
+
+    def build_engine(persist, k, streaming=False):
+        built.append((str(persist), k))
+        return object()
+
+    monkeypatch.setattr(query, "build_engine", build_engine)
+    return versions, built
+
+
+def test_changed_docstore_version_evicts_the_stale_engine(tmp_path, engines):
+    versions, built = engines
+    first = server._get_engine(tmp_path, 5)
+    assert server._get_engine(tmp_path, 5) is first and len(built) == 1
+
+    versions[str(tmp_path)] = "v2"
+    second = server._get_engine(tmp_path, 5)
+    assert second is not first and len(built) == 2
+    assert server._ENGINES == {(str(tmp_path), 5, False): ("v2", second)}
+
+
+def test_slow_build_does_not_block_other_keys(tmp_path, engines, monkeypatch):
+    release = threading.Event()
+    started = threading.Event()
+
+    def build_engine(persist, k, streaming=False):
+        if k == 1:
+            started.set()
+            assert release.wait(5)
+        return object()
+
+    monkeypatch.setattr(query, "build_engine", build_engine)
+    slow = threading.Thread(target=server._get_engine, args=(tmp_path, 1))
+    slow.start()
+    try:
+        assert started.wait(5)
+        # Would deadlock if the first build held the global lock
+        assert server._get_engine(tmp_path, 2) is not None
+    finally:
+        release.set()
+        slow.join(5)
+    assert set(server._ENGINES) == {(str(tmp_path), 1, False), (str(tmp_path), 2, False)}
+
+
+@pytest.mark.parametrize("given, expected", [("MD", "md"), ("Markdown", "md"), ("JSON", "jsonl"), (" Raw ", "raw")])
+def test_query_format_is_normalized(given, expected):
+    assert server.QueryReq(query="q", format=given).format == expected
+
+
+def test_query_format_rejects_unknown_values():
+    with pytest.raises(ValueError):
+        server.QueryReq(query="q", format="html")
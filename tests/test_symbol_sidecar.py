@@ -0,0 +1,59 @@
+from ragcode.jsonio import read_json
+from ragcode.symbol_sidecar import (
+    BY_NAME_FILE,
+    INDEX_FILE,
+    SYMBOLS_FILE,
+    iter_symbol_rows,
+    symbols_count,
+    update_symbols,
+    write_symbols,
+)
+
+
+def _rows(path, *names):
+    return [{"symbol": n, "kind": "function", "canonical_path": path} for n in names]
+
+
+def _live(persist_dir):
+    return sorted((r["canonical_path"], r["symbol"]) for r in iter_symbol_rows(persist_dir / SYMBOLS_FILE))
+
+
+def test_update_tombstones_stale_spans_in_place(tmp_path):
+    assert write_symbols(tmp_path, _rows("a.py", "f", "g") + _rows("b.py", "h") * 20) == 22
+    size = (tmp_path / SYMBOLS_FILE).stat().st_size
+
+    assert update_symbols(tmp_path, {"a.py"}, _rows("a.py", "f2")) == 21
+    # a.py's old span is blanked, not removed: the file only grows by the appended row
+    text = (tmp_path / SYMBOLS_FILE).read_bytes()
+    assert text.startswith(b"#") and len(text) > size
+    idx = read_json(tmp_path / INDEX_FILE)
+    assert idx["live"] == 21 and idx["dead_bytes"] > 0
+    assert ("a.py", "f") not in _live(tmp_path) and ("a.py", "f2") in _live(tmp_path)
+    by_name = read_json(tmp_path / BY_NAME_FILE)
+    assert "f" not in by_name and "g" not in by_name and by_name["f2"][0]["canonical_path"] == "a.py"
+    assert symbols_count(tmp_path) == 21
+
+
+def test_update_compacts_once_tombstones_dominate(tmp_path):
+    write_symbols(tmp_path, _rows("a.py", *"abcdefgh") + _rows("b.py", "z"))
+    assert update_symbols(tmp_path, {"a.py"}, []) == 1
+    # Rewritten from scratch: no tombstones left
+    assert not (tmp_path / SYMBOLS_FILE).read_bytes().startswith(b"#")
+    assert read_json(tmp_path / INDEX_FILE)["dead_bytes"] == 0
+    assert _live(tmp_path) == [("b.py", "z")]
+
+
+def test_removing_every_row_deletes_the_sidecars(tmp_path):
+    write_symbols(tmp_path, _rows("a.py", "f"))
+    assert update_symbols(tmp_path, {"a.py"}, []) == 0
+    assert not (tmp_path / SYMBOLS_FILE).exists()
+    assert symbols_count(tmp_path) == 0
+
+
+def test_update_without_span_index_rewrites(tmp_path):
+    # Sidecar from an older writer: rows only, no symbols_index.json
+    (tmp_path / SYMBOLS_FILE).write_text('{"symbol": "f", "canonical_path": "a.py"}\n')
+    assert symbols_count(tmp_path) == 1
+    assert update_symbols(tmp_path, set(), _rows("b.py", "g")) == 2
+    assert (tmp_path / INDEX_FILE).exists()
+    assert _live(tmp_path) == [("a.py", "f"), ("b.py", "g")]
@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from ragcode.symbols import extract_python_symbols
+
+LATIN1_SOURCE = "# -*- coding: latin-1 -*-\ndef café():\n    class Ünïcode:\n        pass\n"
+
+
+def _names(rows):
+    return [(r["symbol"], r["kind"]) for r in rows]
+
+
+def test_coding_cookie_with_decoded_text():
+    rows = extract_python_symbols(Path("cookie.py"), LATIN1_SOURCE)
+    assert _names(rows) == [("café", "function"), ("Ünïcode", "class")]
+
+
+def test_coding_cookie_with_raw_bytes():
+    rows = extract_python_symbols(Path("cookie_raw.py"), LATIN1_SOURCE.encode("latin-1"))
+    assert _names(rows) == [("café", "function"), ("Ünïcode", "class")]
+
+
+def test_rows_are_copies():
+    rows = extract_python_symbols(Path("copy.py"), "def f():\n    pass\n")
+    rows[0]["canonical_path"] = "copy.py"
+    assert "canonical_path" not in extract_python_symbols(Path("copy.py"), "def f():\n    pass\n")[0]
@@ -0,0 +1,97 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+# Symbols are only extracted alongside the code splitter
+pytest.importorskip("tree_sitter_language_pack")
+
+from llama_index.core import Settings
+from llama_index.core.embeddings import MockEmbedding
+
+from ragcode import indexer
+from ragcode.config import Profile
+from ragcode.jsonio import read_json
+from ragcode.symbol_sidecar import SYMBOLS_FILE, iter_symbol_rows
+
+FILES = {
+    "src/a.py": "def alpha():\n    return 1\n",
+    "src/b.py": "def beta():\n    return 2\n",
+    "src/pkg/c.py": "class Gamma:\n    pass\n",
+    "src/pkg/d.py": "def delta():\n    pass\n",
+}
+
+
+@pytest.fixture
+def built(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    for rel, text in FILES.items():
+        (repo / rel).parent.mkdir(parents=True, exist_ok=True)
+        (repo / rel).write_text(text)
+    monkeypatch.setattr(indexer, "setup_llm", lambda *a, **kw: None)
+    monkeypatch.setattr(indexer, "_setup_embeddings", lambda p: setattr(Settings, "embed_model", MockEmbedding(embed_dim=8)))
+    profile = Profile(name="t", path=str(repo), persist=str(tmp_path / "index"), include=["src"], ext=[".py"], embed="mock", parallel=1)
+    indexer.build_index(profile)
+
+    # Watch updates neither re-hash the docstore nor refit BM25
+    def no_digest(_):
+        raise AssertionError("docstore re-digested")
+
+    def no_prebuild(_):
+        raise AssertionError("BM25 refitted")
+
+    monkeypatch.setattr(indexer, "docstore_digest", no_digest)
+    monkeypatch.setattr(indexer.bm25_rank, "prebuild", no_prebuild)
+    return repo, profile
+
+
+def _state(profile):
+    persist = Path(profile.persist)
+    files = read_json(persist / "filemap.json")["files"]
+    cache = read_json(persist / "files_cache.json")
+    symbols = {r["symbol"]: r["canonical_path"] for r in iter_symbol_rows(persist / SYMBOLS_FILE)}
+    return files, cache, symbols, read_json(persist / "manifest.json")["docstore_blake2"]
+
+
+def test_modify_replaces_nodes_and_symbols(built):
+    repo, profile = built
+    files0, _, _, digest0 = _state(profile)
+    (repo / "src/a.py").write_text("def alpha2():\n    return 10\n")
+    indexer.update_files(profile, [str(repo / "src/a.py")])
+    files, cache, symbols, digest = _state(profile)
+    assert files["src/a.py"]["hash"] != files0["src/a.py"]["hash"]
+    assert not set(files["src/a.py"]["node_ids"]) & set(files0["src/a.py"]["node_ids"])
+    assert files["src/b.py"] == files0["src/b.py"]
+    assert cache["src/a.py"][2] == files["src/a.py"]["hash"]
+    assert symbols["alpha2"] == "src/a.py" and "alpha" not in symbols
+    assert digest != digest0
+
+
+def test_delete_drops_file(built):
+    repo, profile = built
+    (repo / "src/b.py").unlink()
+    indexer.update_files(profile, [str(repo / "src/b.py")])
+    files, cache, symbols, _ = _state(profile)
+    assert "src/b.py" not in files and "src/b.py" not in cache and "beta" not in symbols
+    assert set(files) == {"src/a.py", "src/pkg/c.py", "src/pkg/d.py"}
+
+
+def test_move_reindexes_under_new_path(built):
+    repo, profile = built
+    (repo / "src/a.py").rename(repo / "src/e.py")
+    indexer.update_files(profile, [str(repo / "src/a.py"), str(repo / "src/e.py")])
+    files, cache, symbols, _ = _state(profile)
+    assert "src/a.py" not in files and "src/a.py" not in cache
+    assert files["src/e.py"]["node_ids"] and cache["src/e.py"][2] == files["src/e.py"]["hash"]
+    assert symbols["alpha"] == "src/e.py"
+
+
+def test_directory_moved_out_of_tree(built, tmp_path):
+    repo, profile = built
+    shutil.move(str(repo / "src/pkg"), str(tmp_path / "elsewhere"))
+    indexer.update_files(profile, [str(repo / "src/pkg")])
+    files, cache, symbols, _ = _state(profile)
+    assert set(files) == {"src/a.py", "src/b.py"} and set(cache) == set(files)
+    assert "Gamma" not in symbols and "delta" not in symbols
+    assert set(symbols) == {"alpha", "beta"}